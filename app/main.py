@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, Field
-from typing import Dict, List
+from typing import Annotated, Dict, List
 import logging
+import time
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware # IMPORTAR
 from .matcher_improved import ImprovedPhraseMatcher as PhraseMatcher
@@ -128,6 +129,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+@app.middleware("http")
+async def add_process_time_header(request: Request, call_next):
+    """Agrega el header X-Process-Time con el tiempo de procesamiento en ms."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    response.headers["X-Process-Time"] = f"{(time.perf_counter() - start) * 1000:.3f}"
+    return response
+
+
 # Instancia global del matcher
 matcher = None
 
@@ -153,6 +165,24 @@ class QueryRequest(BaseModel):
         }
 
 
+class BatchQueryRequest(BaseModel):
+    """Modelo para la solicitud de búsqueda en lote."""
+    textos: List[Annotated[str, Field(max_length=500)]] = Field(
+        ...,
+        description="Lista de textos de entrada; se procesan en un solo lote del encoder",
+        min_length=1,
+        max_length=256,
+        examples=[["hola", "necesito ayuda urgente", "gracias"]]
+    )
+
+    class Config:
+        json_schema_extra = {
+            "examples": [
+                {"textos": ["hola", "necesito ayuda urgente", "gracias"]}
+            ]
+        }
+
+
 class QueryResponse(BaseModel):
     """Modelo para la respuesta de búsqueda."""
     query: str = Field(..., description="Texto de consulta original")
@@ -287,6 +317,9 @@ class SpellOutResponse(BaseModel):
 async def startup_event():
     """Inicializa el matcher mejorado al arrancar la aplicación."""
     global matcher
+    if matcher is not None:
+        # Ya inicializado (p. ej. al re-entrar el lifespan en tests); no recargar el modelo
+        return
     try:
         logger.info("Inicializando la aplicación con matcher mejorado...")
         # Usar modelo balanceado optimizado para español con todas las mejoras
@@ -296,6 +329,8 @@ async def startup_event():
             use_synonym_expansion=True  # Expansión de sinónimos
         )
         matcher.initialize()
+        # Cargar el modelo y hacer la primera inferencia antes de aceptar peticiones
+        matcher.warmup()
         logger.info("Aplicación inicializada correctamente con matcher mejorado")
     except Exception as e:
         logger.error(f"Error al inicializar la aplicación: {e}")
@@ -337,6 +372,60 @@ async def root():
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
+def construir_respuesta(resultado: Dict) -> QueryResponse:
+    """
+    Convierte el resultado del matcher en la respuesta de la API, agregando las URLs de video.
+
+    Args:
+        resultado: Diccionario devuelto por el matcher
+
+    Returns:
+        QueryResponse con la URL del video o las URLs del deletreo
+    """
+    frase_similar_key = resultado["frase_similar"]
+    
+    # ⭐️ CORRECCIÓN 1: Inicializar ambas variables antes del bloque IF
+    url_del_video = ""
+    spell_urls_list = None
+    # -----------------------------------------------------------
+    
+    if resultado["deletreo_activado"]:
+        
+        # ⭐️ LÓGICA DE URLS DE DELETREO (DESCOMENTADA Y CORREGIDA) ⭐️
+        deletreo_list = resultado.get("deletreo", [])
+        
+        # Mapear cada elemento del deletreo (H, A, M, LL, etc.) a su URL
+        spell_urls_list = [
+            SPELL_URLS.get(letra, "") 
+            for letra in deletreo_list
+            if SPELL_URLS.get(letra) # Asegurar que solo se incluyan URLs válidas
+        ]
+        
+        # Si el deletreo está activo, url_video se mantiene vacío
+        url_del_video = "" 
+        # ⭐️ FIN LÓGICA DE URLS DE DELETREO ⭐️
+        
+    else:
+        # Lógica normal de búsqueda de URL de frase (solo se ejecuta si NO hay deletreo)
+        url_del_video = URLS_VIDEOS.get(frase_similar_key, "")
+        
+        if not url_del_video:
+            logger.warning(f"URL de video NO encontrada para la frase: {frase_similar_key}")
+
+    # ⭐️ CORRECCIÓN 2: Usar las variables inicializadas/asignadas ⭐️
+    return QueryResponse(
+        query=resultado["query"],
+        grupo=resultado["grupo"],
+        frase_similar=resultado["frase_similar"],
+        similitud=resultado["similitud"],
+        deletreo_activado=resultado["deletreo_activado"],
+        deletreo=resultado.get("deletreo"),
+        total_caracteres=resultado.get("total_caracteres"),
+        url_video=url_del_video, 
+        spell_urls=spell_urls_list # Usa la variable que ya inicializamos/asignamos
+    )
+
+
 @app.post(
     "/buscar",
     response_model=QueryResponse,
@@ -443,54 +532,13 @@ async def buscar_frase_similar(request: QueryRequest):
         logger.info(f"Buscando similitud para: {request.texto}")
         resultado = matcher.search_similar_phrase(request.texto)
         
-        frase_similar_key = resultado["frase_similar"]
-        
-        # ⭐️ CORRECCIÓN 1: Inicializar ambas variables antes del bloque IF
-        url_del_video = ""
-        spell_urls_list = None
-        # -----------------------------------------------------------
-        
-        if resultado["deletreo_activado"]:
-            
-            # ⭐️ LÓGICA DE URLS DE DELETREO (DESCOMENTADA Y CORREGIDA) ⭐️
-            deletreo_list = resultado.get("deletreo", [])
-            
-            # Mapear cada elemento del deletreo (H, A, M, LL, etc.) a su URL
-            spell_urls_list = [
-                SPELL_URLS.get(letra, "") 
-                for letra in deletreo_list
-                if SPELL_URLS.get(letra) # Asegurar que solo se incluyan URLs válidas
-            ]
-            
-            # Si el deletreo está activo, url_video se mantiene vacío
-            url_del_video = "" 
-            # ⭐️ FIN LÓGICA DE URLS DE DELETREO ⭐️
-            
-        else:
-            # Lógica normal de búsqueda de URL de frase (solo se ejecuta si NO hay deletreo)
-            url_del_video = URLS_VIDEOS.get(frase_similar_key, "")
-            
-            if not url_del_video:
-                logger.warning(f"URL de video NO encontrada para la frase: {frase_similar_key}")
-
-        # ⭐️ CORRECCIÓN 2: Usar las variables inicializadas/asignadas ⭐️
-        response = QueryResponse(
-            query=resultado["query"],
-            grupo=resultado["grupo"],
-            frase_similar=resultado["frase_similar"],
-            similitud=resultado["similitud"],
-            deletreo_activado=resultado["deletreo_activado"],
-            deletreo=resultado.get("deletreo"),
-            total_caracteres=resultado.get("total_caracteres"),
-            url_video=url_del_video, 
-            spell_urls=spell_urls_list # Usa la variable que ya inicializamos/asignamos
-        )
+        response = construir_respuesta(resultado)
         # -----------------------------------------------------------
 
         if resultado["deletreo_activado"]:
-            logger.info(f"Resultado: {response.grupo} - {response.similitud} (DELETREO ACTIVADO) - {len(spell_urls_list or [])} URLs")
+            logger.info(f"Resultado: {response.grupo} - {response.similitud} (DELETREO ACTIVADO) - {len(response.spell_urls or [])} URLs")
         else:
-            logger.info(f"Resultado: {response.grupo} - {response.similitud} - URL: {url_del_video[:40]}...")
+            logger.info(f"Resultado: {response.grupo} - {response.similitud} - URL: {response.url_video[:40]}...")
 
         return response
 
@@ -498,6 +546,41 @@ async def buscar_frase_similar(request: QueryRequest):
         logger.error(f"Error al buscar frase similar: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+@app.post(
+    "/buscar/batch",
+    response_model=List[QueryResponse],
+    tags=["Búsqueda"],
+    summary="Buscar frases similares en lote",
+    description="""
+    Igual que `/buscar`, pero para varios textos en una sola request.
+
+    Todos los textos se codifican en un único lote del modelo, lo que reduce el
+    costo por consulta cuando las consultas se conocen de antemano. La respuesta
+    es una lista de resultados en el mismo orden que `textos`.
+    """,
+    responses={
+        400: {"description": "Algún texto vacío o inválido"},
+        503: {"description": "Servicio no disponible (matcher no inicializado)"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def buscar_frases_similares_batch(request: BatchQueryRequest):
+    """Busca la frase más similar para cada texto del lote."""
+    if matcher is None:
+        raise HTTPException(status_code=503, detail="Servicio no disponible: matcher no inicializado")
+
+    if any(not texto or not texto.strip() for texto in request.textos):
+        raise HTTPException(status_code=400, detail="Los textos no pueden estar vacíos")
+
+    try:
+        logger.info(f"Buscando similitud para un lote de {len(request.textos)} textos")
+        resultados = matcher.search_similar_batch(request.textos)
+        return [construir_respuesta(resultado) for resultado in resultados]
+
+    except Exception as e:
+        logger.error(f"Error al buscar frases similares en lote: {e}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
 @app.get(
     "/grupos",
     tags=["Grupos"],
@@ -1,28 +1,91 @@
 import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from pathlib import Path
 import logging
+import os
 
 from .groups import get_all_phrases
 from .preprocess import preprocess_query, preprocess_phrases, normalize_text
 
 
-def clip_similarity(similarity: float) -> float:
+def clip_similarity(similarity):
     """
     Asegura que el valor de similitud esté en el rango [0.0, 1.0].
 
     Esto previene errores numéricos de precisión flotante y ajustes
     (como boosts) que puedan generar valores fuera de rango.
 
+    Los escalares se recortan con min/max de Python (np.clip sobre un escalar
+    paga el despacho de ufunc en cada llamada); los arrays devuelven una copia
+    recortada y no modifican el array recibido.
+
+    Args:
+        similarity: Valor de similitud (escalar o np.ndarray) a normalizar
+
+    Returns:
+        Valor de similitud en el rango [0.0, 1.0] (float, o un array nuevo recortado)
+    """
+    if isinstance(similarity, np.ndarray):
+        return np.clip(similarity, 0.0, 1.0)
+    return min(max(float(similarity), 0.0), 1.0)
+
+
+def _copy_result(result: Dict) -> Dict:
+    """
+    Copia un resultado cacheado para devolverlo al llamador.
+
+    Además del diccionario se copia la lista de deletreo, que es mutable: si se
+    compartiera, modificarla alteraría todas las respuestas posteriores del cache.
+
+    Args:
+        result: Diccionario de resultado guardado en el cache
+
+    Returns:
+        Copia independiente del resultado
+    """
+    deletreo = result.get("deletreo")
+    if deletreo is None:
+        return dict(result)
+    return {**result, "deletreo": list(deletreo)}
+
+
+@lru_cache(maxsize=4)
+def _get_model(model_name: str, device: Optional[str] = None) -> SentenceTransformer:
+    """
+    Carga un modelo de embeddings una sola vez por proceso.
+
+    Todas las instancias del matcher que usan el mismo modelo y dispositivo
+    comparten los pesos.
+
+    Args:
+        model_name: Nombre del modelo de sentence-transformers
+        device: Dispositivo ("cpu", "cuda", "cuda:1", ...). Si es None,
+            sentence-transformers usa CUDA cuando está disponible
+
+    Returns:
+        Modelo cargado
+    """
+    return SentenceTransformer(model_name, device=device)
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cuantiza embeddings a int8 con una escala simétrica por fila.
+
     Args:
-        similarity: Valor de similitud a normalizar
+        embeddings: Matriz (N, D) de embeddings en float
 
     Returns:
-        Valor de similitud en el rango [0.0, 1.0]
+        Tupla con (embeddings_int8, escalas), donde embeddings ≈ int8 * escala
     """
-    return np.clip(similarity, 0.0, 1.0)
+    max_abs = np.abs(embeddings).max(axis=1)
+    scales = (np.where(max_abs > 0, max_abs, 1.0) / 127.0).astype(np.float32)
+    quantized = np.round(embeddings / scales[:, None]).astype(np.int8)
+    return quantized, scales
 
 
 class ImprovedPhraseMatcher:
@@ -68,12 +131,20 @@ class ImprovedPhraseMatcher:
         "gracias": ["agradecimiento", "muchas gracias", "te agradezco"],
     }
 
+    # Cache de consultas: tamaño máximo y umbral coseno para reutilizar un ranking previo
+    QUERY_CACHE_SIZE = 4096
+    SEMANTIC_CACHE_THRESHOLD = 0.97
+
     def __init__(
         self,
         model_type: str = "multilingual_balanced",  # Mejor que el actual
         cache_path: str = "data/embeddings_improved.npz",
         use_reranking: bool = True,
-        use_synonym_expansion: bool = True
+        use_synonym_expansion: bool = True,
+        use_query_cache: Optional[bool] = None,
+        use_semantic_cache: Optional[bool] = None,
+        embedding_dtype: type = np.float32,
+        device: Optional[str] = None
     ):
         """
         Inicializa el matcher mejorado.
@@ -83,16 +154,46 @@ class ImprovedPhraseMatcher:
             cache_path: Ruta para cachear los embeddings
             use_reranking: Activar re-ranking en dos fases
             use_synonym_expansion: Expandir query con sinónimos
+            use_query_cache: Cachear resultados de consultas repetidas. Si es None,
+                se lee la variable de entorno PLN_QUERY_CACHE ("0" lo desactiva)
+            use_semantic_cache: Reutilizar el ranking de una consulta previa cuyo
+                embedding sea casi idéntico (coseno >= SEMANTIC_CACHE_THRESHOLD).
+                Desactivado por defecto: la respuesta pasa a depender del historial
+                de consultas y la similitud reportada no es la de la propia query.
+                Requiere use_query_cache. Si es None, se lee la variable de entorno
+                PLN_SEMANTIC_CACHE ("1" lo activa)
+            embedding_dtype: Tipo con el que se guardan en memoria los embeddings de
+                las frases (np.float16 reduce la memoria a la mitad, también para la
+                matriz de centroides; np.int8 la reduce a un cuarto con cuantización
+                escalar por frase). Los productos se acumulan siempre en float32
+            device: Dispositivo del encoder ("cpu", "cuda", ...). Si es None se lee
+                la variable de entorno PLN_DEVICE; sin ella se elige automáticamente
+                (GPU si está disponible). Solo el encoder corre en el dispositivo:
+                el ranking contra centroides (G x D pequeño) se hace en numpy
         """
         self.model_name = self.MODELS.get(model_type, self.MODELS["current"])
         self.cache_path = cache_path
         self.use_reranking = use_reranking
         self.use_synonym_expansion = use_synonym_expansion
+        if use_query_cache is None:
+            use_query_cache = os.getenv("PLN_QUERY_CACHE", "1") != "0"
+        self.use_query_cache = use_query_cache
+        if use_semantic_cache is None:
+            use_semantic_cache = os.getenv("PLN_SEMANTIC_CACHE", "0") == "1"
+        self.use_semantic_cache = use_semantic_cache
+        self.embedding_dtype = embedding_dtype
+        self.device = device if device is not None else os.getenv("PLN_DEVICE") or None
         self.model = None
         self.grupos_embeddings = {}
+        self.grupos_scales = {}
         self.grupos_frases = {}
         self.grupos_centroids = {}
+        self._centroid_groups = []
+        self._centroids_T = None
+        self._length_boosts = {}
+        self._known_words = frozenset()
         self.logger = logging.getLogger(__name__)
+        self.clear_cache()
 
         # Lista de nombres comunes en español para detección de nombres propios
         self.COMMON_SPANISH_NAMES = {
@@ -113,7 +214,7 @@ class ImprovedPhraseMatcher:
         """Carga el modelo de embeddings si no está cargado."""
         if self.model is None:
             self.logger.info(f"Cargando modelo mejorado: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
+            self.model = _get_model(self.model_name, self.device)
 
     def _expand_with_synonyms(self, query: str) -> List[str]:
         """
@@ -174,16 +275,18 @@ class ImprovedPhraseMatcher:
         self._load_model()
 
         grupos = get_all_phrases()
-        embeddings_dict = {}
 
-        for grupo, frases in grupos.items():
-            frases_procesadas = preprocess_phrases(frases)
-            embeddings = self.model.encode(
-                frases_procesadas,
-                convert_to_numpy=True,
-                normalize_embeddings=True  # Normalizar para mejor similitud
-            )
-            embeddings_dict[grupo] = embeddings
+        # Una sola pasada del modelo para todas las frases; luego se corta por grupo
+        frases_procesadas = [preprocess_phrases(frases) for frases in grupos.values()]
+        embeddings = self.model.encode(
+            [frase for frases in frases_procesadas for frase in frases],
+            batch_size=32,
+            convert_to_numpy=True,
+            normalize_embeddings=True,  # Normalizar para mejor similitud
+            show_progress_bar=False
+        )
+        offsets = np.cumsum([len(frases) for frases in frases_procesadas])[:-1]
+        embeddings_dict = dict(zip(grupos.keys(), np.split(embeddings, offsets)))
 
         # Guardar en cache
         self._save_embeddings_cache(embeddings_dict)
@@ -206,14 +309,62 @@ class ImprovedPhraseMatcher:
             self.logger.error(f"Error al guardar cache: {e}")
 
     def _compute_centroids(self):
-        """Computa los centroides para cada grupo."""
+        """
+        Computa los centroides para cada grupo.
+
+        Además guarda la matriz transpuesta (D, G) de centroides normalizados para
+        puntuar todos los grupos con un único producto matricial por consulta. Con
+        embedding_dtype=np.float16 la matriz se guarda también en float16.
+        """
         self.grupos_centroids = {}
         for grupo, embeddings in self.grupos_embeddings.items():
-            centroid = np.mean(embeddings, axis=0)
+            centroid = np.mean(embeddings, axis=0, dtype=np.float32)
             # Normalizar centroide
             centroid = centroid / np.linalg.norm(centroid)
             self.grupos_centroids[grupo] = centroid
 
+        self._centroid_groups = list(self.grupos_centroids.keys())
+        centroids = np.stack([self.grupos_centroids[g] for g in self._centroid_groups])
+        matrix_dtype = np.float16 if self.embedding_dtype == np.float16 else np.float32
+        self._centroids_T = np.ascontiguousarray(centroids.T, dtype=matrix_dtype)
+
+    def _compute_length_boosts(self):
+        """
+        Precalcula por grupo el boost de cada frase según su número de palabras.
+
+        Frases de 3+ palabras reciben +0.15 y de 2 palabras +0.08 (más contexto =
+        más confiable); así el re-ranking suma un vector en lugar de recorrer las
+        frases en cada consulta.
+        """
+        self._length_boosts = {}
+        for grupo, frases in self.grupos_frases.items():
+            lengths = np.fromiter((len(frase.split()) for frase in frases), dtype=np.int32, count=len(frases))
+            self._length_boosts[grupo] = np.where(
+                lengths >= 3, 0.15, np.where(lengths == 2, 0.08, 0.0)
+            ).astype(np.float32)
+
+    def _compute_known_words(self):
+        """
+        Precalcula las palabras conocidas usadas para detectar nombres propios.
+
+        Son las palabras de todas las frases normalizadas más algunas comunes y
+        variantes con typos; solo dependen del dataset, no de la consulta.
+        """
+        palabras_conocidas = set()
+        for frases in self.grupos_frases.values():
+            for frase_item in frases:
+                # Normalizar y extraer palabras del dataset
+                palabras_conocidas.update(normalize_text(frase_item).split())
+
+        # Agregar palabras comunes adicionales
+        palabras_conocidas.update([
+            'ayuda', 'hola', 'gracias', 'bien', 'mal', 'si', 'no',
+            'vale', 'ok', 'perdon', 'espera', 'entiendo', 'auxilio',
+            'socorro', 'doctor', 'hospital', 'salida', 'fuego', 'urgente',
+            'alto', 'ayda', 'ola', 'hla', 'grcias'  # Incluir variantes y typos del dataset
+        ])
+        self._known_words = frozenset(palabras_conocidas)
+
     def initialize(self):
         """Inicializa el matcher cargando embeddings y computando centroides."""
         self.logger.info("Inicializando PhraseMatcher mejorado")
@@ -224,11 +375,126 @@ class ImprovedPhraseMatcher:
         # Cargar o computar embeddings
         self.grupos_embeddings = self._load_or_compute_embeddings()
 
-        # Computar centroides
+        # Computar centroides (siempre sobre los embeddings en float32)
         self._compute_centroids()
+        self._compute_length_boosts()
+        self._compute_known_words()
+
+        # El cache en disco se mantiene en float32; solo se reduce la copia en memoria
+        self.grupos_scales = {}
+        if self.embedding_dtype == np.int8:
+            for grupo, embeddings in self.grupos_embeddings.items():
+                self.grupos_embeddings[grupo], self.grupos_scales[grupo] = quantize_int8(embeddings)
+        elif self.embedding_dtype != np.float32:
+            self.grupos_embeddings = {
+                grupo: embeddings.astype(self.embedding_dtype)
+                for grupo, embeddings in self.grupos_embeddings.items()
+            }
 
         self.logger.info("PhraseMatcher mejorado inicializado correctamente")
 
+    def warmup(self, query: str = "hola"):
+        """
+        Ejecuta una vez el camino de consulta completo sin tocar los caches.
+
+        initialize() no carga el modelo si los embeddings salen del cache en disco;
+        así la carga de pesos y la primera inferencia se pagan al arrancar y no en
+        la primera petición.
+
+        Args:
+            query: Consulta usada para el calentamiento (el resultado se descarta)
+        """
+        if not self.grupos_centroids:
+            raise ValueError("Matcher no inicializado. Llama a initialize() primero.")
+
+        self.find_most_similar_phrase_reranked(query)
+
+    def clear_cache(self):
+        """Vacía el cache exacto, el cache por texto normalizado y el cache semántico."""
+        self._query_cache = OrderedDict()
+        self._ranking_cache = OrderedDict()
+        self._semantic_embeddings = None
+        self._semantic_rankings = []
+        self._semantic_next = 0
+
+    def _ranking_lookup(self, query: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Busca el ranking de una consulta por su texto normalizado.
+
+        El ranking solo depende de normalize_text(query) (mayúsculas, acentos y
+        puntuación no cambian el embedding), así que "HOLA", "hola" y "Hola!!"
+        comparten entrada sin volver a pasar por el modelo.
+
+        Args:
+            query: Consulta de entrada original
+
+        Returns:
+            Tupla (grupo, frase, similitud) cacheada o None si no existe
+        """
+        key = normalize_text(query)
+        ranking = self._ranking_cache.get(key)
+        if ranking is not None:
+            self._ranking_cache.move_to_end(key)
+        return ranking
+
+    def _ranking_store(self, query: str, ranking: Tuple[str, str, float]):
+        """
+        Guarda el ranking de una consulta bajo su texto normalizado (LRU).
+
+        Args:
+            query: Consulta de entrada original
+            ranking: Tupla (grupo, frase, similitud) calculada para la consulta
+        """
+        self._ranking_cache[normalize_text(query)] = ranking
+        if len(self._ranking_cache) > self.QUERY_CACHE_SIZE:
+            self._ranking_cache.popitem(last=False)
+
+    def _semantic_cache_enabled(self) -> bool:
+        """Indica si el cache semántico está activo (requiere el cache de consultas)."""
+        return self.use_query_cache and self.use_semantic_cache
+
+    def _semantic_lookup(self, query_embedding: np.ndarray) -> Optional[Tuple[str, str, float]]:
+        """
+        Busca un ranking previo cuyo embedding de consulta sea casi idéntico.
+
+        Args:
+            query_embedding: Embedding normalizado de la consulta preprocesada
+
+        Returns:
+            Tupla (grupo, frase, similitud) cacheada o None si no hay coincidencia
+        """
+        if not self._semantic_rankings:
+            return None
+
+        stored = self._semantic_embeddings[:len(self._semantic_rankings)]
+        similarities = stored @ query_embedding
+        best_idx = int(np.argmax(similarities))
+        if similarities[best_idx] >= self.SEMANTIC_CACHE_THRESHOLD:
+            return self._semantic_rankings[best_idx]
+        return None
+
+    def _semantic_store(self, query_embedding: np.ndarray, ranking: Tuple[str, str, float]):
+        """
+        Guarda un ranking en el cache semántico (buffer circular de tamaño fijo).
+
+        Args:
+            query_embedding: Embedding normalizado de la consulta preprocesada
+            ranking: Tupla (grupo, frase, similitud) calculada para la consulta
+        """
+        if self._semantic_embeddings is None:
+            self._semantic_embeddings = np.empty(
+                (self.QUERY_CACHE_SIZE, query_embedding.shape[0]),
+                dtype=query_embedding.dtype
+            )
+
+        slot = self._semantic_next
+        self._semantic_embeddings[slot] = query_embedding
+        if slot < len(self._semantic_rankings):
+            self._semantic_rankings[slot] = ranking
+        else:
+            self._semantic_rankings.append(ranking)
+        self._semantic_next = (slot + 1) % self.QUERY_CACHE_SIZE
+
     def find_best_groups(self, query: str, top_k: int = 2) -> List[Tuple[str, float]]:
         """
         Encuentra los top-k grupos más similares usando centroides.
@@ -267,33 +533,58 @@ class ImprovedPhraseMatcher:
         query_embedding = np.mean(query_embeddings, axis=0)
         query_embedding = query_embedding / np.linalg.norm(query_embedding)
 
-        # Calcular similitud con cada centroide
-        group_scores = []
-        for grupo, centroid in self.grupos_centroids.items():
-            similarity = cosine_similarity([query_embedding], [centroid])[0][0]
-            similarity = clip_similarity(similarity)  # Asegurar rango [0.0, 1.0]
-            group_scores.append((grupo, similarity))
+        return self._rank_groups(query_embedding, top_k)
+
+    def _rank_groups(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """
+        Ordena los grupos por similitud entre el embedding de la query y cada centroide.
+
+        Args:
+            query_embedding: Embedding normalizado (promedio de variaciones)
+            top_k: Número de grupos a retornar
 
-        # Ordenar por similitud descendente
-        group_scores.sort(key=lambda x: x[1], reverse=True)
+        Returns:
+            Lista de tuplas (grupo, similitud)
+        """
+        # Similitud con todos los centroides en un solo producto (vectores ya normalizados);
+        # la query en float32 promueve una matriz float16 y acumula en float32
+        scores = clip_similarity(query_embedding.astype(np.float32) @ self._centroids_T)
 
-        return group_scores[:top_k]
+        # Ordenar por similitud descendente (estable: empates en orden de grupo)
+        order = np.argsort(-scores, kind="stable")[:top_k]
 
-    def find_most_similar_phrase_reranked(self, query: str) -> Tuple[str, str, float]:
+        return [(self._centroid_groups[g], float(scores[g])) for g in order]
+
+    def _phrase_similarities(self, grupo: str, query_embedding: np.ndarray) -> np.ndarray:
         """
-        Encuentra la frase más similar usando re-ranking en dos fases.
+        Calcula la similitud coseno de la query con todas las frases de un grupo.
 
         Args:
-            query: Consulta de entrada
+            grupo: Grupo de frases
+            query_embedding: Embedding normalizado de la query
 
         Returns:
-            Tupla con (grupo, frase_más_similar, score_similitud)
+            Array con la similitud de cada frase del grupo
         """
-        # Fase 1: Encontrar top grupos candidatos
-        # Buscar en top-3 para aumentar cobertura (en lugar de top-2)
-        # Esto ayuda cuando palabras como "alto" no tienen fuerte señal semántica de grupo
-        top_groups = self.find_best_groups(query, top_k=3)
+        embeddings = self.grupos_embeddings[grupo]
+        if grupo in self.grupos_scales:
+            # Embeddings int8: producto escalar y desescalado por frase (ya normalizados)
+            return (embeddings @ query_embedding) * self.grupos_scales[grupo]
+        if embeddings.dtype == np.float16:
+            # float16 solo como almacenamiento: producto escalar acumulado en float32
+            return embeddings @ query_embedding.astype(np.float32)
+        return cosine_similarity([query_embedding], embeddings)[0]
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """
+        Preprocesa la consulta y obtiene su embedding normalizado.
+
+        Args:
+            query: Consulta de entrada
 
+        Returns:
+            Embedding de la consulta preprocesada
+        """
         self._load_model()
 
         # Obtener todas las frases para corrección
@@ -304,13 +595,39 @@ class ImprovedPhraseMatcher:
         # Preprocesar query
         query_processed = preprocess_query(query, all_phrases)
 
-        # Obtener embedding del query
-        query_embedding = self.model.encode(
+        return self.model.encode(
             [query_processed],
             convert_to_numpy=True,
             normalize_embeddings=True
         )[0]
 
+    def find_most_similar_phrase_reranked(
+        self,
+        query: str,
+        query_embedding: Optional[np.ndarray] = None,
+        top_groups: Optional[List[Tuple[str, float]]] = None
+    ) -> Tuple[str, str, float]:
+        """
+        Encuentra la frase más similar usando re-ranking en dos fases.
+
+        Args:
+            query: Consulta de entrada
+            query_embedding: Embedding de la consulta ya calculado (opcional)
+            top_groups: Grupos candidatos ya calculados (opcional)
+
+        Returns:
+            Tupla con (grupo, frase_más_similar, score_similitud)
+        """
+        # Fase 1: Encontrar top grupos candidatos
+        # Buscar en top-3 para aumentar cobertura (en lugar de top-2)
+        # Esto ayuda cuando palabras como "alto" no tienen fuerte señal semántica de grupo
+        if top_groups is None:
+            top_groups = self.find_best_groups(query, top_k=3)
+
+        # Obtener embedding del query
+        if query_embedding is None:
+            query_embedding = self._encode_query(query)
+
         best_group = None
         best_phrase = None
         best_similarity = -1.0
@@ -319,26 +636,19 @@ class ImprovedPhraseMatcher:
         self.logger.debug(f"Top grupos candidatos para '{query}': {top_groups}")
 
         for grupo, group_score in top_groups:
-            embeddings = self.grupos_embeddings[grupo]
             frases = self.grupos_frases[grupo]
 
             # Calcular similitud con todas las frases del grupo
-            similarities = cosine_similarity([query_embedding], embeddings)[0]
+            similarities = self._phrase_similarities(grupo, query_embedding)
 
             # MEJORA: Aplicar boost a frases largas (más contexto = más confiable)
-            # Esto ayuda a priorizar frases originales completas sobre palabras sueltas
+            # Esto ayuda a priorizar frases originales completas sobre palabras sueltas.
+            # El boost por frase está precalculado (ver _compute_length_boosts)
             boosted_similarities = similarities.copy()
             # Asegurar que no excedemos el tamaño del array
-            num_frases = min(len(frases), len(boosted_similarities))
-            for idx in range(num_frases):
-                frase = frases[idx]
-                frase_len = len(frase.split())  # Número de palabras
-                # Boost progresivo: frases de 2+ palabras reciben bonus fuerte
-                if frase_len >= 3:
-                    boosted_similarities[idx] += 0.15  # Frases largas: +15% (aumentado de 10%)
-                elif frase_len == 2:
-                    boosted_similarities[idx] += 0.08  # Frases medianas: +8% (aumentado de 5%)
-                # Palabras sueltas no reciben boost (penalizadas relativamente)
+            boosts = self._length_boosts[grupo]
+            num_frases = min(len(boosts), len(boosted_similarities))
+            boosted_similarities[:num_frases] += boosts[:num_frases]
 
             # Encontrar la mejor similitud en este grupo (con boost aplicado)
             max_idx = np.argmax(boosted_similarities)
@@ -363,9 +673,8 @@ class ImprovedPhraseMatcher:
         # Si no se encontró nada por threshold, retornar el mejor absoluto
         if best_group is None:
             grupo = top_groups[0][0]
-            embeddings = self.grupos_embeddings[grupo]
             frases = self.grupos_frases[grupo]
-            similarities = cosine_similarity([query_embedding], embeddings)[0]
+            similarities = self._phrase_similarities(grupo, query_embedding)
             max_idx = np.argmax(similarities)
             best_similarity = similarities[max_idx]
             best_similarity = clip_similarity(best_similarity)  # Asegurar rango [0.0, 1.0]
@@ -379,19 +688,93 @@ class ImprovedPhraseMatcher:
         Busca la frase más similar usando estrategia mejorada.
         Si la similitud está por debajo del umbral de deletreo, activa el modo deletreo.
 
+        Con el cache de consultas activo, una query idéntica se resuelve desde un
+        LRU y una query con el mismo texto normalizado (mayúsculas, acentos,
+        puntuación) reutiliza el ranking sin pasar por el modelo. Con
+        use_semantic_cache, además, una query cuyo embedding coincide (coseno >=
+        SEMANTIC_CACHE_THRESHOLD) reutiliza el ranking previo. Las validaciones de
+        nombres siempre se aplican sobre el texto original.
+
         Args:
             query: Consulta de entrada
 
         Returns:
             Diccionario con resultado de la búsqueda y deletreo si aplica
         """
-        if self.use_reranking:
-            grupo, frase, similarity = self.find_most_similar_phrase_reranked(query)
-        else:
+        if not self.use_query_cache:
+            return self._search_similar_phrase_uncached(query)
+
+        cached = self._query_cache.get(query)
+        if cached is not None:
+            self._query_cache.move_to_end(query)
+            return _copy_result(cached)
+
+        result = self._search_similar_phrase_uncached(query)
+        self._query_cache[query] = result
+        if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return _copy_result(result)
+
+    def _search_similar_phrase_uncached(self, query: str) -> Dict:
+        """
+        Ejecuta el pipeline completo de búsqueda para una consulta.
+
+        Args:
+            query: Consulta de entrada
+
+        Returns:
+            Diccionario con resultado de la búsqueda y deletreo si aplica
+        """
+        ranking = self._ranking_lookup(query) if self.use_query_cache else None
+        if ranking is None:
+            ranking = self._rank_query(query)
+            if self.use_query_cache:
+                self._ranking_store(query, ranking)
+
+        return self._build_result(query, *ranking)
+
+    def _rank_query(self, query: str) -> Tuple[str, str, float]:
+        """
+        Calcula el ranking de una consulta pasando por el modelo.
+
+        Con re-ranking y cache semántico activos consulta antes ese cache. El
+        método básico también depende solo del texto normalizado, así que su
+        ranking se cachea igual (clear_cache() si se cambia use_reranking).
+
+        Args:
+            query: Consulta de entrada
+
+        Returns:
+            Tupla (grupo, frase, similitud)
+        """
+        if not self.use_reranking:
             # Fallback a método básico
             best_group = self.find_best_groups(query, top_k=1)[0][0]
-            grupo, frase, similarity = self.find_most_similar_phrase(query, best_group)
+            return self.find_most_similar_phrase(query, best_group)
+
+        if not self._semantic_cache_enabled():
+            return self.find_most_similar_phrase_reranked(query)
+
+        query_embedding = self._encode_query(query)
+        ranking = self._semantic_lookup(query_embedding)
+        if ranking is None:
+            ranking = self.find_most_similar_phrase_reranked(query, query_embedding)
+            self._semantic_store(query_embedding, ranking)
+        return ranking
+
+    def _build_result(self, query: str, grupo: str, frase: str, similarity: float) -> Dict:
+        """
+        Aplica las validaciones de deletreo sobre un ranking y arma la respuesta.
+
+        Args:
+            query: Consulta de entrada original
+            grupo: Grupo de la mejor frase
+            frase: Mejor frase encontrada
+            similarity: Similitud de la mejor frase
 
+        Returns:
+            Diccionario con resultado de la búsqueda y deletreo si aplica
+        """
         # Verificar si se debe activar el modo deletreo
         spell_out_threshold = self.SPELL_OUT_THRESHOLDS.get(grupo, 0.60)
         should_spell_out = similarity < spell_out_threshold
@@ -408,21 +791,8 @@ class ImprovedPhraseMatcher:
             query_len = len(query_words[0])
             # Nombres típicos: 3-8 caracteres
             if 3 <= query_len <= 8:
-                # Construir lista dinámica de palabras conocidas del dataset
-                palabras_conocidas = set()
-                for frases in self.grupos_frases.values():
-                    for frase_item in frases:
-                        # Normalizar y extraer palabras del dataset
-                        frase_normalized = normalize_text(frase_item)
-                        palabras_conocidas.update(frase_normalized.split())
-
-                # Agregar palabras comunes adicionales
-                palabras_conocidas.update([
-                    'ayuda', 'hola', 'gracias', 'bien', 'mal', 'si', 'no',
-                    'vale', 'ok', 'perdon', 'espera', 'entiendo', 'auxilio',
-                    'socorro', 'doctor', 'hospital', 'salida', 'fuego', 'urgente',
-                    'alto', 'ayda', 'ola', 'hla', 'grcias'  # Incluir variantes y typos del dataset
-                ])
+                # Palabras conocidas del dataset (precalculadas en initialize)
+                palabras_conocidas = self._known_words
 
                 self.logger.debug(f"Query normalizado: '{query_normalized}', en palabras_conocidas: {query_normalized in palabras_conocidas}")
 
@@ -503,6 +873,119 @@ class ImprovedPhraseMatcher:
             "total_caracteres": None
         }
 
+    def search_similar_batch(self, queries: List[str], batch_size: int = 64) -> List[Dict]:
+        """
+        Busca la frase más similar para varias consultas a la vez.
+
+        Codifica todas las consultas (y sus variaciones por sinónimos) en una sola
+        llamada a model.encode y clasifica los grupos con un único producto de
+        matrices contra los centroides. El resultado de cada consulta es el mismo
+        que devolvería search_similar_phrase.
+
+        Las consultas repetidas dentro del lote se resuelven una sola vez (no
+        guarda estado entre llamadas, así que no depende del cache de consultas).
+
+        Args:
+            queries: Lista de consultas de entrada
+            batch_size: Tamaño de lote para el encoder
+
+        Returns:
+            Lista de diccionarios de resultado, en el mismo orden que queries
+        """
+        if not self.grupos_centroids:
+            raise ValueError("Matcher no inicializado. Llama a initialize() primero.")
+
+        if not self.use_reranking:
+            return [self.search_similar_phrase(query) for query in queries]
+
+        results: List[Optional[Dict]] = [None] * len(queries)
+        pending: List[str] = []
+        pending_positions: List[List[int]] = []
+        pending_index: Dict[str, int] = {}
+        for pos, query in enumerate(queries):
+            slot = pending_index.get(query)
+            if slot is not None:
+                # Repetida dentro del lote: se resuelve con la primera aparición
+                pending_positions[slot].append(pos)
+                continue
+
+            if self.use_query_cache:
+                cached = self._query_cache.get(query)
+                if cached is not None:
+                    self._query_cache.move_to_end(query)
+                else:
+                    ranking = self._ranking_lookup(query)
+                    if ranking is not None:
+                        # Misma consulta normalizada ya rankeada: solo aplicar validaciones
+                        cached = self._build_result(query, *ranking)
+                        self._query_cache[query] = cached
+                        if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                            self._query_cache.popitem(last=False)
+                if cached is not None:
+                    results[pos] = cached
+                    continue
+
+            pending_index[query] = len(pending)
+            pending.append(query)
+            pending_positions.append([pos])
+
+        if pending:
+            self._load_model()
+
+            # Obtener todas las frases para corrección
+            all_phrases = []
+            for frases in self.grupos_frases.values():
+                all_phrases.extend(frases)
+
+            # Preprocesar y expandir todas las queries; la primera variación es la query procesada
+            variations = [
+                self._expand_with_synonyms(preprocess_query(query, all_phrases))
+                for query in pending
+            ]
+            offsets = np.cumsum([0] + [len(v) for v in variations[:-1]])
+            counts = np.array([len(v) for v in variations])
+
+            embeddings = self.model.encode(
+                [text for group in variations for text in group],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+
+            # Promediar variaciones por query y normalizar: (B, D)
+            group_queries = np.add.reduceat(embeddings, offsets, axis=0) / counts[:, None]
+            group_queries /= np.linalg.norm(group_queries, axis=1, keepdims=True)
+
+            # Similitud contra todos los centroides en un solo producto: (B, G)
+            group_names = self._centroid_groups
+            group_scores = clip_similarity(group_queries @ self._centroids_T)
+            order = np.argsort(-group_scores, axis=1, kind="stable")[:, :3]
+
+            use_semantic_cache = self._semantic_cache_enabled()
+            for i, query in enumerate(pending):
+                query_embedding = embeddings[offsets[i]]
+                top_groups = [(group_names[g], group_scores[i, g]) for g in order[i]]
+
+                ranking = self._semantic_lookup(query_embedding) if use_semantic_cache else None
+                if ranking is None:
+                    ranking = self.find_most_similar_phrase_reranked(
+                        query, query_embedding, top_groups
+                    )
+                    if use_semantic_cache:
+                        self._semantic_store(query_embedding, ranking)
+                if self.use_query_cache:
+                    self._ranking_store(query, ranking)
+
+                result = self._build_result(query, *ranking)
+                if self.use_query_cache:
+                    self._query_cache[query] = result
+                    if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                        self._query_cache.popitem(last=False)
+                for pos in pending_positions[i]:
+                    results[pos] = result
+
+        return [_copy_result(result) for result in results]
+
     def find_most_similar_phrase(self, query: str, group: Optional[str] = None) -> Tuple[str, str, float]:
         """
         Encuentra la frase más similar (método básico para compatibilidad).
@@ -545,11 +1028,10 @@ class ImprovedPhraseMatcher:
             if grupo not in self.grupos_embeddings:
                 continue
 
-            embeddings = self.grupos_embeddings[grupo]
             frases = self.grupos_frases[grupo]
 
             # Calcular similitud con todas las frases del grupo
-            similarities = cosine_similarity([query_embedding], embeddings)[0]
+            similarities = self._phrase_similarities(grupo, query_embedding)
 
             # Encontrar la mejor similitud en este grupo
             max_idx = np.argmax(similarities)
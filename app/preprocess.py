@@ -1,7 +1,26 @@
 import re
 import unicodedata
+from functools import lru_cache
 from typing import List
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+
+def _strip_marks(text: str) -> str:
+    """Elimina las marcas diacríticas (categoría Mn) tras descomponer en NFD."""
+    text = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+
+
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s]')
+
+# Tabla de normalización para ASCII + Latin-1 (ya en minúsculas): los signos que
+# _SPECIAL_CHARS_RE limpiaría (. , ! ¿ ¡ @ ...) pasan a espacio y los acentos se
+# quitan (á -> a, ñ -> n, ...). Ambas partes se derivan de la regex y de la
+# descomposición NFD, así que el resultado es idéntico al camino general.
+_NORMALIZE_TABLE = str.maketrans({
+    **{c: ' ' for c in map(chr, range(0x100)) if _SPECIAL_CHARS_RE.match(c)},
+    **{c: _strip_marks(c) for c in map(chr, range(0xE0, 0x100)) if _strip_marks(c) != c},
+})
 
 
 def remove_repeated_punctuation(text: str) -> str:
@@ -42,26 +61,26 @@ def normalize_text(text: str) -> str:
     Returns:
         Texto normalizado
     """
-    # Convertir a minúsculas
-    text = text.lower()
-
-    # Normalizar puntuación repetida ANTES de removerla
-    text = remove_repeated_punctuation(text)
-
-    # Remover acentos
-    text = unicodedata.normalize('NFD', text)
-    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    # Minúsculas, acentos y caracteres especiales de ASCII/Latin-1 en una sola
+    # pasada (tabla precalculada): solo quedan letras, números y espacios.
+    # La puntuación repetida queda absorbida aquí: cada signo pasa a espacio y
+    # los espacios se colapsan después.
+    text = text.lower().translate(_NORMALIZE_TABLE)
 
-    # Limpiar caracteres especiales, mantener solo letras, números y espacios
-    text = re.sub(r'[^\w\s]', ' ', text)
+    # Fuera de Latin-1 (camino poco frecuente): descomposición NFD completa y
+    # limpieza de caracteres especiales con la regex Unicode
+    if not text.isascii():
+        text = _SPECIAL_CHARS_RE.sub(' ', _strip_marks(text))
 
-    # Normalizar espacios múltiples a uno solo
-    text = re.sub(r'\s+', ' ', text)
+    # Normalizar espacios múltiples a uno solo y recortar extremos: split() sin
+    # argumentos corta por cualquier espacio Unicode (igual que \s) en C
+    return ' '.join(text.split())
 
-    # Remover espacios al inicio y final
-    text = text.strip()
 
-    return text
+@lru_cache(maxsize=8192)
+def _normalize_reference(phrase: str) -> str:
+    """normalize_text cacheado para las frases de referencia (conjunto acotado)."""
+    return normalize_text(phrase)
 
 
 def light_spelling_correction(query: str, reference_phrases: List[str], threshold: float = 80.0) -> str:
@@ -78,21 +97,20 @@ def light_spelling_correction(query: str, reference_phrases: List[str], threshol
         Texto corregido o el original si no se encuentra corrección
     """
     query_normalized = normalize_text(query)
-    best_match = ""
-    best_score = 0.0
-
-    for phrase in reference_phrases:
-        phrase_normalized = normalize_text(phrase)
-        score = fuzz.ratio(query_normalized, phrase_normalized)
 
-        if score > best_score and score >= threshold:
-            best_score = score
-            best_match = phrase
+    # Las frases de referencia se repiten entre consultas: su forma normalizada
+    # sale de cache y la búsqueda del mejor score se hace en C (rapidfuzz)
+    match = process.extractOne(
+        query_normalized,
+        [_normalize_reference(phrase) for phrase in reference_phrases],
+        scorer=fuzz.ratio,
+        score_cutoff=threshold
+    )
 
     # Si encontramos una buena coincidencia y es suficientemente diferente,
     # sugerimos la corrección
-    if best_match and best_score >= threshold:
-        return best_match
+    if match is not None and match[1] > 0:
+        return reference_phrases[match[2]]
 
     return query
 
@@ -185,10 +203,62 @@ def normalize_leet_speak(text: str) -> str:
     return ''.join(normalized)
 
 
+# Nombres hablados de los signos que se deletrean por nombre
+_SPELL_SPECIAL_CHARS = {
+    '.': 'punto',
+    ',': 'coma',
+    ';': 'punto y coma',
+    ':': 'dos puntos',
+    '!': 'exclamación',
+    '?': 'interrogación',
+    '-': 'guión',
+    '_': 'guión bajo',
+    '@': 'arroba',
+    '#': 'numeral',
+    '$': 'dólar',
+    '%': 'porcentaje',
+    '&': 'ampersand',
+    '/': 'barra',
+    '\\': 'barra invertida',
+    '(': 'paréntesis abierto',
+    ')': 'paréntesis cerrado',
+    '[': 'corchete abierto',
+    ']': 'corchete cerrado',
+    '{': 'llave abierta',
+    '}': 'llave cerrada',
+    '+': 'más',
+    '=': 'igual',
+    '*': 'asterisco',
+    '"': 'comillas',
+    "'": 'comilla simple',
+}
+
+# Dígrafos del español primero para que la alternancia los prefiera al carácter suelto
+_SPELL_TOKEN_RE = re.compile(r'LL|RR|CH|.', re.DOTALL)
+
+
+def _spell_token(token: str) -> str:
+    """Deletreo de un token (dígrafo o carácter) ya en mayúsculas."""
+    if token == ' ':
+        return 'espacio'
+    if len(token) == 2 or token.isalpha() or token.isdigit():
+        return token
+    return _SPELL_SPECIAL_CHARS.get(token, f"carácter especial: {token}")
+
+
+# Tabla precalculada para dígrafos y todo el rango ASCII; el resto usa _spell_token
+_SPELL_TABLE = {
+    token: _spell_token(token)
+    for token in ['LL', 'RR', 'CH'] + [chr(c) for c in range(128)]
+}
+
+
 def spell_out_text(text: str, include_spaces: bool = True) -> List[str]:
     """
     Deletrea un texto carácter por carácter.
 
+    Los dígrafos LL, RR y CH se deletrean como una sola unidad.
+
     Args:
         text: Texto a deletrear
         include_spaces: Si True, incluye espacios en el deletreo
@@ -199,65 +269,17 @@ def spell_out_text(text: str, include_spaces: bool = True) -> List[str]:
     if not text:
         return []
 
-    result = []
-    i=0
-    text_upper = text.upper()
-    while i < len(text_upper):
-        char = text_upper[i]
-        if i + 1 < len(text_upper) and text_upper[i:i+2] == 'LL':
-            result.append('LL')
-            i += 2
-            continue
-        
-        # 2. Comprobar 'RR'
-        if i + 1 < len(text_upper) and text_upper[i:i+2] == 'RR':
-            result.append('RR')
-            i += 2
-            continue
-        
-        # 3. Comprobar 'CH'
-        if i + 1 < len(text_upper) and text_upper[i:i+2] == 'CH':
-            result.append('CH')
-            i += 2
-            continue
-        
-        if char == ' ':
-            if include_spaces:
-                result.append("espacio")
-        elif char.isalpha():
-            result.append(char)
-        elif char.isdigit():
-            result.append(char)
-        else:
-            # Para caracteres especiales, usar su nombre
-            special_chars = {
-                '.': 'punto',
-                ',': 'coma',
-                ';': 'punto y coma',
-                ':': 'dos puntos',
-                '!': 'exclamación',
-                '?': 'interrogación',
-                '-': 'guión',
-                '_': 'guión bajo',
-                '@': 'arroba',
-                '#': 'numeral',
-                '$': 'dólar',
-                '%': 'porcentaje',
-                '&': 'ampersand',
-                '/': 'barra',
-                '\\': 'barra invertida',
-                '(': 'paréntesis abierto',
-                ')': 'paréntesis cerrado',
-                '[': 'corchete abierto',
-                ']': 'corchete cerrado',
-                '{': 'llave abierta',
-                '}': 'llave cerrada',
-                '+': 'más',
-                '=': 'igual',
-                '*': 'asterisco',
-                '"': 'comillas',
-                "'": 'comilla simple',
-            }
-            result.append(special_chars.get(char, f"carácter especial: {char}"))
-        i += 1
-    return result
\ No newline at end of file
+    # El cache guarda tuplas inmutables; cada llamada recibe su propia lista
+    return list(_spell_out_cached(text, include_spaces))
+
+
+@lru_cache(maxsize=4096)
+def _spell_out_cached(text: str, include_spaces: bool) -> tuple:
+    """Deletreo memoizado de spell_out_text (las consultas sin match se repiten)."""
+    tokens = _SPELL_TOKEN_RE.findall(text.upper())
+    if not include_spaces:
+        # Solo ' ' se deletrea como "espacio": se descarta antes de la tabla
+        tokens = [token for token in tokens if token != ' ']
+
+    table = _SPELL_TABLE
+    return tuple(table[token] if token in table else _spell_token(token) for token in tokens)
@@ -4,57 +4,105 @@ Este archivo es cargado automáticamente por pytest.
 """
 
 import pytest
+from types import MappingProxyType
+from filelock import FileLock
 from fastapi.testclient import TestClient
 from app.matcher_improved import ImprovedPhraseMatcher
 from app import main
 
 
+# Queries de ejemplo compartidas; inmutables para poder reutilizarlas en toda la sesión
+_SAMPLE_QUERIES = MappingProxyType({
+    "emergencia": (
+        "ayuda por favor",
+        "necesito ayuda urgente",
+        "llama a la policía",
+        "es una emergencia",
+    ),
+    "saludos": (
+        "hola",
+        "buenos días",
+        "buenas tardes",
+        "cómo estás",
+    ),
+    "agradecimientos": (
+        "gracias",
+        "muchas gracias",
+        "te lo agradezco",
+    ),
+    "edge_cases": (
+        "Ivan",
+        "xyz123",
+        "a",
+        "",
+    ),
+})
+
+
 # Inicializar matcher globalmente para tests de API
 @pytest.fixture(scope="session", autouse=True)
-def initialize_matcher_for_api():
+def initialize_matcher_for_api(matcher_session):
     """
     Inicializa el matcher globalmente antes de ejecutar tests de API.
     autouse=True hace que se ejecute automáticamente.
+    Reutiliza el matcher de la sesión: un solo matcher por proceso.
     """
     if main.matcher is None:
-        main.matcher = ImprovedPhraseMatcher(
-            model_type="multilingual_balanced",
-            use_reranking=True,
-            use_synonym_expansion=True
-        )
-        main.matcher.initialize()
+        main.matcher = matcher_session
     yield
     # Cleanup si es necesario
 
 
 @pytest.fixture(scope="session")
-def matcher_session():
+def matcher_session(request, tmp_path_factory):
     """
     Matcher compartido para toda la sesión de tests.
     Optimiza el rendimiento al inicializar el modelo una sola vez.
+
+    Con pytest-xdist, los workers inicializan de a uno (file lock compartido):
+    el primero computa y guarda el cache de embeddings y el resto lo carga.
     """
     m = ImprovedPhraseMatcher(
         model_type="multilingual_balanced",
         use_reranking=True,
         use_synonym_expansion=True
     )
-    m.initialize()
+    _initialize_matcher(m, request, tmp_path_factory)
     return m
 
 
-@pytest.fixture
-def matcher():
+@pytest.fixture(scope="session")
+def matcher_factory(request, tmp_path_factory, matcher_session):
     """
-    Matcher fresco para cada test individual.
-    Usar cuando se necesite aislamiento completo.
+    Fábrica de matchers memoizada por argumentos del constructor.
+
+    Sin argumentos devuelve matcher_session; cada variante (p. ej. float16,
+    int8 o sin cache de consultas) se inicializa una sola vez por sesión.
+    El modelo se comparte entre todas (cache por proceso de _get_model).
     """
-    m = ImprovedPhraseMatcher(
-        model_type="multilingual_balanced",
-        use_reranking=True,
-        use_synonym_expansion=True
-    )
-    m.initialize()
-    return m
+    matchers = {(): matcher_session}
+
+    def make(**kwargs):
+        key = tuple(sorted(kwargs.items()))
+        if key not in matchers:
+            m = ImprovedPhraseMatcher(**kwargs)
+            _initialize_matcher(m, request, tmp_path_factory)
+            matchers[key] = m
+        return matchers[key]
+
+    return make
+
+
+def _initialize_matcher(m, request, tmp_path_factory):
+    """Inicializa un matcher; con pytest-xdist, de a un worker por vez."""
+    if not hasattr(request.config, "workerinput"):
+        m.initialize()
+        return
+
+    # El basetemp de cada worker cuelga del mismo directorio raíz de la sesión
+    lock_path = tmp_path_factory.getbasetemp().parent / "matcher_init.lock"
+    with FileLock(str(lock_path)):
+        m.initialize()
 
 
 @pytest.fixture
@@ -65,36 +113,12 @@ def api_client():
     return TestClient(main.app)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_queries():
     """
-    Queries de ejemplo para pruebas.
+    Queries de ejemplo para pruebas (solo lectura).
     """
-    return {
-        "emergencia": [
-            "ayuda por favor",
-            "necesito ayuda urgente",
-            "llama a la policía",
-            "es una emergencia",
-        ],
-        "saludos": [
-            "hola",
-            "buenos días",
-            "buenas tardes",
-            "cómo estás",
-        ],
-        "agradecimientos": [
-            "gracias",
-            "muchas gracias",
-            "te lo agradezco",
-        ],
-        "edge_cases": [
-            "Ivan",
-            "xyz123",
-            "a",
-            "",
-        ]
-    }
+    return _SAMPLE_QUERIES
 
 
 def pytest_configure(config):
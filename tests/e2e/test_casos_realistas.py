@@ -10,15 +10,12 @@ Incluye:
 - Casos de deletreo
 """
 import pytest
-from app.matcher_improved import ImprovedPhraseMatcher
 
 
 @pytest.fixture
-def matcher():
-    """Fixture del matcher inicializado."""
-    m = ImprovedPhraseMatcher()
-    m.initialize()
-    return m
+def matcher(matcher_factory):
+    """Fixture del matcher inicializado (configuración por defecto, compartido en la sesión)."""
+    return matcher_factory()
 
 
 class TestErroresTipeoComunes:
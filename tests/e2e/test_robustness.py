@@ -9,7 +9,7 @@ Metodología: Perturbation Testing
 
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from app.main import app, QueryResponse
 
 
 @pytest.fixture
@@ -17,6 +17,19 @@ def client():
     return TestClient(app)
 
 
+def parse_buscar(response) -> QueryResponse:
+    """
+    Valida el cuerpo de /buscar directamente contra el modelo de respuesta.
+    Evita el paso intermedio json.loads -> dict en los tests de carga.
+    """
+    return QueryResponse.model_validate_json(response.content)
+
+
+# Texto base para inputs de longitud variable: se construye una vez y se recorta por test
+_VARYING_LENGTH_BASE = "hola ayuda gracias "
+_VARYING_LENGTH_TEXT = _VARYING_LENGTH_BASE * 4  # cubre hasta 76 caracteres
+
+
 @pytest.mark.e2e
 @pytest.mark.semantic
 class TestTypoRobustness:
@@ -344,8 +357,8 @@ class TestStressAndLoad:
         for query in queries_with_typos:
             response = client.post("/buscar", json={"texto": query})
             if response.status_code == 200:
-                data = response.json()
-                if 0.0 <= data["similitud"] <= 1.0:
+                data = parse_buscar(response)
+                if 0.0 <= data.similitud <= 1.0:
                     success += 1
 
         success_rate = success / len(queries_with_typos)
@@ -370,9 +383,9 @@ class TestStressAndLoad:
             response = client.post("/buscar", json={"texto": query})
             assert response.status_code == 200
 
-            data = response.json()
+            data = parse_buscar(response)
             # Lo crítico: NUNCA debe salir del rango
-            assert 0.0 <= data["similitud"] <= 1.0, \
+            assert 0.0 <= data.similitud <= 1.0, \
                 f"Query '{query}' generó similitud fuera de rango"
 
     @pytest.mark.parametrize("length", [1, 2, 5, 10, 20, 50])
@@ -380,15 +393,13 @@ class TestStressAndLoad:
         """
         Inputs de diferentes longitudes (desde 1 char hasta 50).
         """
-        # Generar query de longitud variable
-        base = "hola ayuda gracias "
-        query = (base * (length // len(base) + 1))[:length]
+        query = _VARYING_LENGTH_TEXT[:length]
 
         response = client.post("/buscar", json={"texto": query})
         assert response.status_code == 200
 
-        data = response.json()
-        assert 0.0 <= data["similitud"] <= 1.0
+        data = parse_buscar(response)
+        assert 0.0 <= data.similitud <= 1.0
 
 
 @pytest.mark.e2e
@@ -5,13 +5,15 @@ Prueban los endpoints completos con el servidor de testing.
 
 import pytest
 from fastapi.testclient import TestClient
+from app import main
 from app.main import app
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client():
-    """Cliente de testing para la API."""
-    return TestClient(app)
+    """Cliente de testing para la API, compartido por todo el módulo."""
+    with TestClient(app) as c:
+        yield c
 
 
 @pytest.mark.integration
@@ -139,6 +141,38 @@ class TestBuscarEndpoint:
         assert 0.0 <= data["similitud"] <= 1.0
 
 
+@pytest.mark.integration
+class TestBuscarBatchEndpoint:
+    """Tests para el endpoint POST /buscar/batch."""
+
+    def test_batch_matches_single_endpoint(self, client, monkeypatch):
+        """El lote debe devolver lo mismo que /buscar, en el mismo orden."""
+        # Sin cache: si no, cada /buscar devolvería el resultado guardado por el lote
+        monkeypatch.setattr(main.matcher, "use_query_cache", False)
+        textos = ["hola", "necesito ayuda urgente", "gracias", "xyz123"]
+        response = client.post("/buscar/batch", json={"textos": textos})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert [item["query"] for item in data] == textos
+        for texto, item in zip(textos, data):
+            single = client.post("/buscar", json={"texto": texto}).json()
+            assert item["grupo"] == single["grupo"]
+            assert item["frase_similar"] == single["frase_similar"]
+            assert item["deletreo_activado"] == single["deletreo_activado"]
+            assert item["similitud"] == pytest.approx(single["similitud"], abs=1e-4)
+
+    def test_batch_empty_text(self, client):
+        """Un texto vacío dentro del lote debe retornar error 400."""
+        response = client.post("/buscar/batch", json={"textos": ["hola", "   "]})
+        assert response.status_code == 400
+
+    def test_batch_empty_list(self, client):
+        """Lista vacía debe retornar error 422."""
+        response = client.post("/buscar/batch", json={"textos": []})
+        assert response.status_code == 422
+
+
 @pytest.mark.integration
 class TestGruposEndpoint:
     """Tests para endpoints de grupos."""
@@ -224,6 +258,17 @@ class TestHealthEndpoint:
         assert data["status"] == "healthy"
 
 
+@pytest.mark.integration
+class TestProcessTimeHeader:
+    """Tests para el header X-Process-Time."""
+
+    def test_process_time_header(self, client):
+        """Toda respuesta debe incluir el tiempo de procesamiento en ms."""
+        response = client.post("/buscar", json={"texto": "hola"})
+        assert response.status_code == 200
+        assert float(response.headers["X-Process-Time"]) >= 0.0
+
+
 @pytest.mark.integration
 class TestRootEndpoint:
     """Tests para el endpoint raíz GET /."""
@@ -239,3 +284,27 @@ class TestRootEndpoint:
         assert "total_frases" in data
         assert data["status"] == "OK"
         assert len(data["grupos_disponibles"]) == 3
+
+
+@pytest.mark.integration
+class TestMatcherLifecycle:
+    """Tests del ciclo de vida del matcher global de la API."""
+
+    def test_matcher_shared_across_requests(self, client):
+        """Todas las requests deben usar la misma instancia del matcher."""
+        matcher_before = main.matcher
+        assert matcher_before is not None
+
+        client.post("/buscar", json={"texto": "hola"})
+        client.get("/health")
+
+        assert main.matcher is matcher_before
+
+    def test_lifespan_reentry_reuses_matcher(self, client):
+        """Re-entrar el lifespan (nuevo TestClient) no debe recargar el matcher."""
+        matcher_before = main.matcher
+
+        with TestClient(app) as other_client:
+            assert other_client.get("/health").status_code == 200
+
+        assert main.matcher is matcher_before
@@ -0,0 +1,29 @@
+"""
+Fixtures compartidos por los tests de rendimiento.
+"""
+
+import asyncio
+
+import pytest
+
+try:
+    import uvloop  # Llega con uvicorn[standard]; no existe en Windows
+except ImportError:
+    uvloop = None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _uvloop():
+    """
+    Usa uvloop como event loop de los tests async de rendimiento si está disponible.
+
+    pytest-asyncio crea el loop de cada test desde la política activa, así que basta
+    con fijarla una vez por sesión (por worker con pytest-xdist).
+    """
+    if uvloop is None:
+        yield
+        return
+    previous = asyncio.get_event_loop_policy()
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    yield
+    asyncio.set_event_loop_policy(previous)
@@ -15,19 +15,44 @@ Ejecución:
     locust -f tests/performance/locustfile.py --host=http://localhost:8000 \
            --users 50 --spawn-rate 5 --run-time 2m --csv=results --headless
 
+    # Percentiles P50..P99.9 por endpoint (gate de regresión en CI)
+    locust -f tests/performance/locustfile.py --host=http://localhost:8000 \
+           --users 50 --spawn-rate 5 --run-time 2m --headless \
+           --csv=results --csv-full-history --percentiles-csv=percentiles.csv
+
+    # Latencias solo de servidor (header X-Process-Time) en todas las requests a /buscar
+    locust -f tests/performance/locustfile.py --host=http://localhost:8000 \
+           --users 50 --spawn-rate 5 --run-time 2m --headless --server-time
+
 Escenarios:
     - ReadOnlyUser: Solo consultas (90% de tráfico)
     - NormalUser: Consultas + exploraciones (10% de tráfico)
+    - OpenModelUser: Llegadas a ritmo fijo para planificación de capacidad
+
+Modelo cerrado vs abierto:
+    Con between(a, b) cada usuario espera a que termine su request antes de
+    contar la pausa, así que si la API se vuelve lenta la tasa de llegada baja
+    sola (modelo cerrado) y el test nunca ve la capacidad real. Con
+    constant_throughput/constant_pacing el intervalo entre llegadas es fijo y
+    la latencia de la API no frena al generador (modelo abierto).
+
+Los usuarios de carga heredan de FastHttpUser (geventhttpclient) en lugar de
+HttpUser (requests): el cliente consume mucha menos CPU por request, así el
+generador no se auto-limita antes de saturar la API. Cada usuario mantiene su
+propio pool de conexiones keep-alive, así las requests no pagan el handshake TCP.
 """
 
-from locust import HttpUser, task, between, events
+from locust import HttpUser, task, between, constant_pacing, constant_throughput, events
+from locust.contrib.fasthttp import FastHttpUser
+from gevent.pool import Group
+from contextlib import contextmanager
+import csv
 import random
-import time
 import json
 
 
 # Datos de test realistas
-QUERIES_EMERGENCIA = [
+QUERIES_EMERGENCIA = (
     "ayuda",
     "necesito ayuda",
     "ayuda por favor",
@@ -35,9 +60,9 @@ QUERIES_EMERGENCIA = [
     "ayuda urgente",
     "socorro",
     "auxilio",
-]
+)
 
-QUERIES_SALUDOS = [
+QUERIES_SALUDOS = (
     "hola",
     "buenos días",
     "buenas tardes",
@@ -45,9 +70,9 @@ QUERIES_SALUDOS = [
     "hola amigo",
     "qué tal",
     "cómo estás",
-]
+)
 
-QUERIES_AGRADECIMIENTO = [
+QUERIES_AGRADECIMIENTO = (
     "gracias",
     "muchas gracias",
     "te lo agradezco",
@@ -55,75 +80,90 @@ QUERIES_AGRADECIMIENTO = [
     "si",
     "vale",
     "entiendo",
-]
+)
 
-QUERIES_TYPOS = [
+QUERIES_TYPOS = (
     "ola",      # typo de hola
     "ayda",     # typo de ayuda
     "grcias",   # typo de gracias
     "hla",      # typo de hola
-]
+)
 
-QUERIES_NOMBRES = [
+QUERIES_NOMBRES = (
     "Juan",
     "Maria",
     "Carlos",
     "Ana",
     "Pedro",
-]
+)
 
-QUERIES_NOMBRES_PATTERNS = [
+QUERIES_NOMBRES_PATTERNS = (
     "Me llamo Juan",
     "Mi nombre es Maria",
     "Me llamo Carlos",
     "Mi nombre es Ana",
-]
+)
 
 ALL_QUERIES = QUERIES_EMERGENCIA + QUERIES_SALUDOS + QUERIES_AGRADECIMIENTO
+GRUPOS = ("A", "B", "C")
+TEXTOS_DELETREO = ("test", "hola", "xyz123")
+
+# Cuerpos JSON de /buscar serializados una sola vez al importar
+JSON_HEADERS = {"Content-Type": "application/json"}
+BUSCAR_PAYLOADS = {
+    query: json.dumps({"texto": query}).encode("utf-8")
+    for query in ALL_QUERIES + QUERIES_TYPOS + QUERIES_NOMBRES + QUERIES_NOMBRES_PATTERNS
+}
+
+# Fracción de respuestas /buscar [normal] que se parsean completas para validar el rango
+VALIDATION_SAMPLE_RATE = 0.01
+
+# Generador aleatorio propio del módulo (evita el estado global de random en cada pick)
+_rng = random.Random()
 
+# Headers fijos para todas las requests: conexión persistente (HTTP/1.1 keep-alive)
+KEEP_ALIVE_HEADERS = {"Connection": "keep-alive"}
 
-class ReadOnlyUser(HttpUser):
+
+class ReadOnlyUser(FastHttpUser):
     """
     Usuario que solo hace consultas (lectura).
     Representa 90% del tráfico típico.
     """
-    wait_time = between(1, 3)  # Espera entre 1-3 segundos entre requests
+    wait_time = constant_throughput(5)  # 5 requests/s por usuario, independiente de la latencia
     weight = 9  # 90% de los usuarios serán de este tipo
+    network_timeout = 10.0
+    connection_timeout = 5.0
+    default_headers = KEEP_ALIVE_HEADERS
 
     @task(10)
     def buscar_query_normal(self):
         """
         Task más común: Buscar query normal (saludos, ayuda, gracias).
         """
-        query = random.choice(ALL_QUERIES)
-        with self.client.post(
-            "/buscar",
-            json={"texto": query},
-            catch_response=True,
-            name="POST /buscar [normal]"
-        ) as response:
-            if response.status_code == 200:
-                data = response.json()
-                # Validar respuesta
-                if "similitud" in data and 0.0 <= data["similitud"] <= 1.0:
+        query = _rng.choice(ALL_QUERIES)
+        with buscar_request(self, query, "POST /buscar [normal]") as response:
+            if response.status_code != 200:
+                response.failure(f"Status code: {response.status_code}")
+            elif b'"similitud":' not in response.content:
+                response.failure("Respuesta sin similitud")
+            elif _rng.random() < VALIDATION_SAMPLE_RATE:
+                # Validación completa (parseo JSON) solo en una muestra de requests
+                similitud = json.loads(response.content)["similitud"]
+                if 0.0 <= similitud <= 1.0:
                     response.success()
                 else:
-                    response.failure(f"Similitud inválida: {data.get('similitud')}")
+                    response.failure(f"Similitud inválida: {similitud}")
             else:
-                response.failure(f"Status code: {response.status_code}")
+                response.success()
 
     @task(3)
     def buscar_query_con_typo(self):
         """
         Usuario comete error de tipeo.
         """
-        query = random.choice(QUERIES_TYPOS)
-        with self.client.post(
-            "/buscar",
-            json={"texto": query},
-            catch_response=True,
-            name="POST /buscar [typo]"
-        ) as response:
+        query = _rng.choice(QUERIES_TYPOS)
+        with buscar_request(self, query, "POST /buscar [typo]") as response:
             if response.status_code == 200:
                 data = response.json()
                 if 0.0 <= data.get("similitud", -1) <= 1.0:
@@ -138,13 +178,8 @@ class ReadOnlyUser(HttpUser):
         """
         Usuario escribe un nombre (debe activar deletreo).
         """
-        query = random.choice(QUERIES_NOMBRES)
-        with self.client.post(
-            "/buscar",
-            json={"texto": query},
-            catch_response=True,
-            name="POST /buscar [nombre]"
-        ) as response:
+        query = _rng.choice(QUERIES_NOMBRES)
+        with buscar_request(self, query, "POST /buscar [nombre]") as response:
             if response.status_code == 200:
                 data = response.json()
                 # Nombres deben activar deletreo
@@ -161,13 +196,8 @@ class ReadOnlyUser(HttpUser):
         """
         Usuario usa patrón 'Me llamo X'.
         """
-        query = random.choice(QUERIES_NOMBRES_PATTERNS)
-        with self.client.post(
-            "/buscar",
-            json={"texto": query},
-            catch_response=True,
-            name="POST /buscar [patron_nombre]"
-        ) as response:
+        query = _rng.choice(QUERIES_NOMBRES_PATTERNS)
+        with buscar_request(self, query, "POST /buscar [patron_nombre]") as response:
             if response.status_code == 200:
                 data = response.json()
                 if data.get("nombre_detectado"):
@@ -189,19 +219,23 @@ class ReadOnlyUser(HttpUser):
                 response.failure("Health check failed")
 
 
-class NormalUser(HttpUser):
+class NormalUser(FastHttpUser):
     """
     Usuario que explora la API (lectura + exploración).
     Representa 10% del tráfico.
     """
     wait_time = between(2, 5)
     weight = 1  # 10% de los usuarios
+    network_timeout = 10.0
+    connection_timeout = 5.0
+    default_headers = KEEP_ALIVE_HEADERS
 
     @task(5)
     def buscar_query(self):
         """Buscar query normal."""
-        query = random.choice(ALL_QUERIES)
-        self.client.post("/buscar", json={"texto": query}, name="POST /buscar")
+        query = _rng.choice(ALL_QUERIES)
+        with buscar_request(self, query, "POST /buscar"):
+            pass
 
     @task(2)
     def ver_todos_grupos(self):
@@ -219,7 +253,7 @@ class NormalUser(HttpUser):
     @task(1)
     def ver_grupo_especifico(self):
         """Ver frases de un grupo específico."""
-        grupo = random.choice(["A", "B", "C"])
+        grupo = _rng.choice(GRUPOS)
         with self.client.get(f"/grupos/{grupo}", catch_response=True, name="GET /grupos/{grupo}") as response:
             if response.status_code == 200:
                 data = response.json()
@@ -233,7 +267,7 @@ class NormalUser(HttpUser):
     @task(1)
     def deletrear_texto(self):
         """Usar endpoint de deletreo directo."""
-        texto = random.choice(["test", "hola", "xyz123"])
+        texto = _rng.choice(TEXTOS_DELETREO)
         with self.client.post(
             "/deletreo",
             json={"texto": texto, "incluir_espacios": False},
@@ -263,21 +297,52 @@ class NormalUser(HttpUser):
                 response.failure(f"Status: {response.status_code}")
 
 
-class StressUser(HttpUser):
+class OpenModelUser(FastHttpUser):
+    """
+    Usuario de modelo abierto para planificación de capacidad.
+    Lanza una consulta cada 200ms sin importar cuánto tarde la API.
+
+    Ejecución:
+        locust -f tests/performance/locustfile.py --host=http://localhost:8000 \
+               --users 50 --spawn-rate 10 --run-time 5m --headless \
+               OpenModelUser
+    """
+    wait_time = constant_pacing(0.2)
+    weight = 0  # Solo se usa si se selecciona explícitamente
+    network_timeout = 10.0
+    connection_timeout = 5.0
+    default_headers = KEEP_ALIVE_HEADERS
+
+    @task
+    def buscar_query(self):
+        """Buscar query normal a ritmo fijo."""
+        query = _rng.choice(ALL_QUERIES)
+        with buscar_request(self, query, "POST /buscar [open]"):
+            pass
+
+
+class StressUser(FastHttpUser):
     """
     Usuario agresivo para stress testing.
     NO incluir en tests normales, solo para encontrar límites.
     """
-    wait_time = between(0.1, 0.5)  # Muy rápido
+    wait_time = constant_throughput(20)  # 20 ráfagas/s de 10 requests: hasta 200 requests/s por usuario
     weight = 0  # Desactivado por defecto
+    network_timeout = 10.0
+    connection_timeout = 5.0
+    default_headers = KEEP_ALIVE_HEADERS
 
     @task
     def rapid_fire_queries(self):
-        """Queries muy rápidas."""
-        for _ in range(10):
-            query = random.choice(ALL_QUERIES)
-            self.client.post("/buscar", json={"texto": query})
-            time.sleep(0.05)  # 50ms entre queries
+        """Ráfaga de 10 queries concurrentes (greenlets sobre el pool de FastHttpUser)."""
+        burst = Group()
+        for query in _rng.choices(ALL_QUERIES, k=10):
+            burst.spawn(self._buscar, query)
+        burst.join()
+
+    def _buscar(self, query):
+        with buscar_request(self, query):
+            pass
 
 
 # ==================== EVENT LISTENERS ====================
@@ -293,6 +358,59 @@ def on_test_start(environment, **kwargs):
     print("="*60 + "\n")
 
 
+PERCENTILES = (0.5, 0.75, 0.9, 0.95, 0.99, 0.999)
+
+
+@events.init_command_line_parser.add_listener
+def on_init_parser(parser):
+    """Agrega la opción para volcar percentiles a CSV."""
+    parser.add_argument(
+        "--percentiles-csv",
+        type=str,
+        default="",
+        help="Ruta del CSV con percentiles de latencia por endpoint (vacío = no escribir)"
+    )
+    parser.add_argument(
+        "--server-time",
+        action="store_true",
+        default=False,
+        help="Reportar en todas las requests a /buscar el tiempo del header X-Process-Time (solo servidor) en lugar del wall-clock"
+    )
+
+
+def use_server_time(response, environment):
+    """
+    Reemplaza el tiempo de respuesta reportado por el tiempo de procesamiento
+    del servidor (header X-Process-Time) si se pidió con --server-time.
+    """
+    if not getattr(environment.parsed_options, "server_time", False):
+        return
+    process_time = response.headers.get("X-Process-Time")
+    if process_time is not None:
+        response.request_meta["response_time"] = float(process_time)
+
+
+@contextmanager
+def buscar_request(user, query, name=None):
+    """
+    POST /buscar con el cuerpo precomputado de `query`.
+
+    Todas las tareas que llaman a /buscar pasan por aquí, así --server-time se
+    aplica a todas y la fila "Total" (y --percentiles-csv) no mezcla latencias
+    de servidor con latencias de extremo a extremo. Si la tarea no marca
+    success/failure, locust decide por el código de estado.
+    """
+    with user.client.post(
+        "/buscar",
+        data=BUSCAR_PAYLOADS[query],
+        headers=JSON_HEADERS,
+        catch_response=True,
+        name=name
+    ) as response:
+        use_server_time(response, user.environment)
+        yield response
+
+
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
     """Se ejecuta al final del test."""
@@ -308,8 +426,22 @@ def on_test_stop(environment, **kwargs):
     print(f"  Avg response time:     {stats.total.avg_response_time:.2f}ms")
     print(f"  Min response time:     {stats.total.min_response_time:.2f}ms")
     print(f"  Max response time:     {stats.total.max_response_time:.2f}ms")
-    print(f"  Median response time:  {stats.total.median_response_time:.2f}ms")
     print(f"  Requests/s:            {stats.total.total_rps:.2f}")
+    for p in PERCENTILES:
+        print(f"  P{p * 100:<5g} response time:  {stats.total.get_response_time_percentile(p):.2f}ms")
+
+    csv_path = getattr(environment.parsed_options, "percentiles_csv", "")
+    if csv_path:
+        header = ["method", "name", "requests", "failures"] + [f"p{p * 100:g}" for p in PERCENTILES]
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for entry in list(stats.entries.values()) + [stats.total]:
+                writer.writerow(
+                    [entry.method or "", entry.name, entry.num_requests, entry.num_failures]
+                    + [entry.get_response_time_percentile(p) for p in PERCENTILES]
+                )
+        print(f"\n  Percentiles guardados en: {csv_path}")
 
     print("\n" + "="*60 + "\n")
 
@@ -334,7 +466,8 @@ class QuickTest(HttpUser):
         self.client.get("/health")
 
         # Query simple
-        self.client.post("/buscar", json={"texto": "hola"})
+        with buscar_request(self, "hola"):
+            pass
 
         # Ver grupos
         self.client.get("/grupos")
@@ -400,6 +533,7 @@ if __name__ == "__main__":
     Escenarios disponibles:
     - ReadOnlyUser:  90% usuarios, solo consultas
     - NormalUser:    10% usuarios, consultas + exploración
+    - OpenModelUser: Desactivado, llegadas a ritmo fijo (capacidad)
     - StressUser:    Desactivado, para stress extremo
     - QuickTest:     Test rápido de humo
 
@@ -9,42 +9,145 @@ Metodologías:
 """
 
 import pytest
+import pytest_asyncio
+import httpx
 import time
 import asyncio
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from statistics import mean, stdev
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from fastapi.testclient import TestClient
+from app import main
 from app.main import app
-from app.matcher_improved import ImprovedPhraseMatcher
+
+
+# Headers fijos de todas las requests (se fijan una vez en el cliente, no por llamada)
+DEFAULT_HEADERS = {"content-type": "application/json"}
+
+# Errores esperables del lado cliente (los del servidor llegan como respuestas 500)
+REQUEST_ERRORS = (httpx.HTTPError, json.JSONDecodeError)
+
+
+@pytest.fixture(scope="session")
+def uncached_matcher(matcher_factory):
+    """
+    Matcher sin cache de consultas (instancia propia, no la de la sesión).
+    Sin él, tras la primera request todo sería un acierto de cache y los tests
+    medirían búsquedas en diccionarios en lugar del pipeline completo.
+    """
+    return matcher_factory(use_query_cache=False)
+
+
+@pytest.fixture(autouse=True)
+def _uncached_api_matcher(uncached_matcher, monkeypatch):
+    """La API de estos tests responde con el matcher sin cache."""
+    monkeypatch.setattr(main, "matcher", uncached_matcher)
 
 
 @pytest.fixture(scope="module")
-def matcher():
-    """Matcher para tests de estrés."""
-    m = ImprovedPhraseMatcher(
-        model_type="multilingual_balanced",
-        use_reranking=True,
-        use_synonym_expansion=True
+def client():
+    """
+    Cliente de testing para la API, compartido por todo el módulo.
+    Los errores del servidor se devuelven como 500 (como en producción) en vez de re-lanzarse.
+    """
+    with TestClient(app, raise_server_exceptions=False, headers=DEFAULT_HEADERS) as c:
+        yield c
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    """
+    Cliente asíncrono contra la app ASGI (sin servidor ni hilos).
+    ASGITransport no ejecuta el startup: el matcher lo inyecta `_uncached_api_matcher`.
+    Los errores del servidor se devuelven como 500 en vez de re-lanzarse (igual que `client`).
+    """
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=DEFAULT_HEADERS) as c:
+        yield c
+
+
+def distinct_queries(base, n, tag):
+    """
+    Genera n queries distintas a partir de `base` con un sufijo único por `tag`.
+
+    Así ni la deduplicación del lote ni ningún cache acortan el trabajo medido.
+    """
+    return [f"{base[i % len(base)]} {tag}-{i}" for i in range(n)]
+
+
+def buscar_payload(texto):
+    """Serializa una vez el cuerpo JSON de /buscar para reutilizarlo en los loops."""
+    return json.dumps({"texto": texto}).encode("utf-8")
+
+
+def batch_payload(textos):
+    """Serializa una vez el cuerpo JSON de /buscar/batch para reutilizarlo en los loops."""
+    return json.dumps({"textos": list(textos)}).encode("utf-8")
+
+
+def validar_similitudes(response, n, _loads=json.loads):
+    """
+    Verifica que cada similitud de una respuesta de /buscar/batch esté en [0.0, 1.0].
+
+    Solo parsea el cuerpo si la respuesta fue exitosa (sin pasar por response.json()).
+
+    Args:
+        response: Respuesta HTTP de /buscar/batch
+        n: Número de queries del lote
+
+    Returns:
+        Lista de booleanos, uno por query
+    """
+    if response.status_code != 200:
+        return [False] * n
+    return [0.0 <= item["similitud"] <= 1.0 for item in _loads(response.content)]
+
+
+def session_arrays(statuses, latencies, valids):
+    """
+    Empaqueta los resultados de una sesión como arrays (una entrada por query).
+
+    Args:
+        statuses: Códigos HTTP
+        latencies: Latencias en nanosegundos (int64)
+        valids: Si la similitud de cada respuesta está en [0.0, 1.0]
+
+    Returns:
+        Tupla (statuses, latencies, valids) de arrays numpy
+    """
+    return (
+        np.asarray(statuses, dtype=np.int64),
+        np.asarray(latencies, dtype=np.int64),
+        np.asarray(valids, dtype=bool),
     )
-    m.initialize()
-    return m
 
 
-@pytest.fixture
-def client():
-    """Cliente de testing para la API."""
-    return TestClient(app)
+def concat_sessions(sessions):
+    """Concatena las tuplas de arrays de todas las sesiones en una sola tupla."""
+    return tuple(np.concatenate(columns) for columns in zip(*sessions))
+
+
+def print_latency_percentiles(statuses, latencies):
+    """Imprime P50/P95/P99 (en ms) de las latencias en ns de las requests exitosas."""
+    latencies = latencies[statuses == 200]
+    if latencies.size == 0:
+        return
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99], method="nearest")
+    print(f"   Latencia P50/P95/P99: {p50/1e6:.2f} / {p95/1e6:.2f} / {p99/1e6:.2f} ms")
 
 
 @pytest.mark.performance
 @pytest.mark.slow
+@pytest.mark.xdist_group("stress")
 class TestConcurrentLoad:
     """
     Tests de carga concurrente - múltiples usuarios simultáneos.
     Metodología: Concurrent Load Testing
     """
 
-    def test_concurrent_10_users(self, client):
+    @pytest.mark.asyncio
+    async def test_concurrent_10_users(self, async_client):
         """
         10 usuarios concurrentes haciendo queries simultáneas.
         Objetivo: Sistema debe mantener latencia <200ms con 10 usuarios.
@@ -54,63 +157,61 @@ class TestConcurrentLoad:
 
         queries = ["hola", "ayuda", "gracias", "buenos días", "muchas gracias"]
 
-        def user_session(user_id):
-            """Simula una sesión de usuario."""
-            results = []
-            for i in range(queries_per_user):
-                query = queries[i % len(queries)]
-                start = time.time()
-                response = client.post("/buscar", json={"texto": query})
-                latency = time.time() - start
-
-                results.append({
-                    "user_id": user_id,
-                    "query": query,
-                    "status": response.status_code,
-                    "latency": latency,
-                    "valid": 0.0 <= response.json().get("similitud", -1) <= 1.0 if response.status_code == 200 else False
-                })
-            return results
+        n = queries_per_user
+        payloads = [batch_payload(distinct_queries(queries, n, f"u{uid}")) for uid in range(num_users)]
+
+        async def user_session(user_id):
+            """Simula una sesión de usuario (todas sus queries en un solo lote)."""
+            start = time.perf_counter_ns()
+            response = await async_client.post("/buscar/batch", content=payloads[user_id])
+            latency_ns = (time.perf_counter_ns() - start) // n  # Latencia por query
+
+            return session_arrays(
+                np.full(n, response.status_code),
+                np.full(n, latency_ns),
+                validar_similitudes(response, n)
+            )
 
         # Ejecutar usuarios concurrentemente
-        start_time = time.time()
-        with ThreadPoolExecutor(max_workers=num_users) as executor:
-            futures = [executor.submit(user_session, user_id) for user_id in range(num_users)]
-            all_results = []
-            for future in as_completed(futures):
-                all_results.extend(future.result())
-        total_time = time.time() - start_time
+        start_time = time.perf_counter_ns()
+        sessions = await asyncio.gather(*[user_session(user_id) for user_id in range(num_users)])
+        statuses, latencies, valids = concat_sessions(sessions)
+        total_time = (time.perf_counter_ns() - start_time) / 1e9
 
         # Análisis de resultados
-        total_queries = len(all_results)
-        successful = sum(1 for r in all_results if r["status"] == 200)
-        valid_responses = sum(1 for r in all_results if r["valid"])
-        latencies = [r["latency"] for r in all_results if r["status"] == 200]
-
-        avg_latency = mean(latencies)
-        max_latency = max(latencies)
-        min_latency = min(latencies)
-        p95_latency = sorted(latencies)[int(len(latencies) * 0.95)]
+        ok = statuses == 200
+        total_queries = statuses.size
+        successful = int(ok.sum())
+        valid_responses = int((valids & ok).sum())
+        latencies = latencies[ok]
+
+        avg_latency = latencies.mean()
+        max_latency = latencies.max()
+        min_latency = latencies.min()
+        p50_latency, p95_latency, p99_latency = np.percentile(latencies, [50, 95, 99], method="nearest")
         throughput = total_queries / total_time
 
         print(f"\n📊 CONCURRENT LOAD TEST (10 usuarios):")
         print(f"   Total queries:     {total_queries}")
         print(f"   Exitosas:          {successful}/{total_queries} ({successful/total_queries*100:.1f}%)")
         print(f"   Respuestas válidas: {valid_responses}/{total_queries} ({valid_responses/total_queries*100:.1f}%)")
-        print(f"   Latencia promedio: {avg_latency*1000:.2f}ms")
-        print(f"   Latencia mínima:   {min_latency*1000:.2f}ms")
-        print(f"   Latencia máxima:   {max_latency*1000:.2f}ms")
-        print(f"   Latencia P95:      {p95_latency*1000:.2f}ms")
+        print(f"   Latencia promedio: {avg_latency/1e6:.2f}ms")
+        print(f"   Latencia mínima:   {min_latency/1e6:.2f}ms")
+        print(f"   Latencia máxima:   {max_latency/1e6:.2f}ms")
+        print(f"   Latencia P50:      {p50_latency/1e6:.2f}ms")
+        print(f"   Latencia P95:      {p95_latency/1e6:.2f}ms")
+        print(f"   Latencia P99:      {p99_latency/1e6:.2f}ms")
         print(f"   Throughput:        {throughput:.1f} queries/s")
         print(f"   Tiempo total:      {total_time:.2f}s")
 
         # Validaciones
         assert successful / total_queries >= 0.95, f"Tasa de éxito baja: {successful/total_queries*100:.1f}%"
         assert valid_responses / total_queries >= 0.95, "Muchas respuestas inválidas"
-        assert avg_latency < 0.2, f"Latencia promedio alta: {avg_latency*1000:.0f}ms"
-        assert p95_latency < 0.5, f"P95 muy alto: {p95_latency*1000:.0f}ms"
+        assert avg_latency < 200_000_000, f"Latencia promedio alta: {avg_latency/1e6:.0f}ms"
+        assert p95_latency < 500_000_000, f"P95 muy alto: {p95_latency/1e6:.0f}ms"
 
-    def test_concurrent_50_users(self, client):
+    @pytest.mark.asyncio
+    async def test_concurrent_50_users(self, async_client):
         """
         50 usuarios concurrentes - Test de estrés moderado.
         Objetivo: Sistema debe mantener >90% éxito con 50 usuarios.
@@ -120,48 +221,40 @@ class TestConcurrentLoad:
 
         queries = ["hola", "ayuda", "gracias", "buenos días", "emergencia"]
 
-        def user_session(user_id):
-            results = []
-            for i in range(queries_per_user):
-                query = queries[i % len(queries)]
-                try:
-                    start = time.time()
-                    response = client.post("/buscar", json={"texto": query})
-                    latency = time.time() - start
-
-                    results.append({
-                        "status": response.status_code,
-                        "latency": latency,
-                        "valid": 0.0 <= response.json().get("similitud", -1) <= 1.0 if response.status_code == 200 else False
-                    })
-                except Exception as e:
-                    results.append({
-                        "status": 500,
-                        "latency": 0,
-                        "valid": False,
-                        "error": str(e)
-                    })
-            return results
+        n = queries_per_user
+        payloads = [batch_payload(distinct_queries(queries, n, f"u{uid}")) for uid in range(num_users)]
+
+        async def user_session(user_id):
+            try:
+                start = time.perf_counter_ns()
+                response = await async_client.post("/buscar/batch", content=payloads[user_id])
+                latency_ns = (time.perf_counter_ns() - start) // n  # Latencia por query
+
+                return session_arrays(
+                    np.full(n, response.status_code),
+                    np.full(n, latency_ns),
+                    validar_similitudes(response, n)
+                )
+            except REQUEST_ERRORS:
+                return session_arrays(np.full(n, 500), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=bool))
 
         # Ejecutar
-        start_time = time.time()
-        with ThreadPoolExecutor(max_workers=num_users) as executor:
-            futures = [executor.submit(user_session, uid) for uid in range(num_users)]
-            all_results = []
-            for future in as_completed(futures):
-                all_results.extend(future.result())
-        total_time = time.time() - start_time
+        start_time = time.perf_counter_ns()
+        sessions = await asyncio.gather(*[user_session(uid) for uid in range(num_users)])
+        statuses, latencies, valids = concat_sessions(sessions)
+        total_time = (time.perf_counter_ns() - start_time) / 1e9
 
         # Análisis
-        total = len(all_results)
-        successful = sum(1 for r in all_results if r["status"] == 200)
-        valid = sum(1 for r in all_results if r["valid"])
+        total = statuses.size
+        successful = int((statuses == 200).sum())
+        valid = int(valids.sum())
         success_rate = successful / total
 
         print(f"\n📊 STRESS TEST (50 usuarios):")
         print(f"   Total queries:  {total}")
         print(f"   Exitosas:       {successful} ({success_rate*100:.1f}%)")
         print(f"   Válidas:        {valid} ({valid/total*100:.1f}%)")
+        print_latency_percentiles(statuses, latencies)
         print(f"   Tiempo total:   {total_time:.2f}s")
         print(f"   Throughput:     {total/total_time:.1f} q/s")
 
@@ -169,43 +262,46 @@ class TestConcurrentLoad:
         assert success_rate >= 0.90, f"Tasa de éxito muy baja: {success_rate*100:.1f}%"
 
     @pytest.mark.slow
-    def test_concurrent_100_users_breaking_point(self, client):
+    @pytest.mark.asyncio
+    async def test_concurrent_100_users_breaking_point(self, async_client):
         """
         100 usuarios concurrentes - Encontrar punto de quiebre.
         Objetivo: Documentar comportamiento bajo estrés extremo.
+
+        Los usuarios son corrutinas en el event loop contra la app vía ASGI
+        (sin pool de 100 hilos), para que el punto de quiebre medido sea el
+        del servidor y no el del harness.
         """
         num_users = 100
         queries_per_user = 3
 
         queries = ["hola", "ayuda", "gracias"]
 
-        def user_session(user_id):
-            results = []
-            for i in range(queries_per_user):
-                try:
-                    start = time.time()
-                    response = client.post("/buscar", json={"texto": queries[i]})
-                    latency = time.time() - start
-                    results.append({"status": response.status_code, "latency": latency})
-                except Exception as e:
-                    results.append({"status": 500, "latency": 0, "error": str(e)})
-            return results
-
-        start_time = time.time()
-        with ThreadPoolExecutor(max_workers=num_users) as executor:
-            futures = [executor.submit(user_session, uid) for uid in range(num_users)]
-            all_results = []
-            for future in as_completed(futures):
-                all_results.extend(future.result())
-        total_time = time.time() - start_time
+        n = queries_per_user
+        payloads = [batch_payload(distinct_queries(queries, n, f"u{uid}")) for uid in range(num_users)]
 
-        total = len(all_results)
-        successful = sum(1 for r in all_results if r["status"] == 200)
+        async def user_session(user_id):
+            try:
+                start = time.perf_counter_ns()
+                response = await async_client.post("/buscar/batch", content=payloads[user_id])
+                latency_ns = (time.perf_counter_ns() - start) // n  # Latencia por query
+                return session_arrays(np.full(n, response.status_code), np.full(n, latency_ns), np.ones(n, dtype=bool))
+            except REQUEST_ERRORS:
+                return session_arrays(np.full(n, 500), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=bool))
+
+        start_time = time.perf_counter_ns()
+        sessions = await asyncio.gather(*[user_session(uid) for uid in range(num_users)])
+        statuses, latencies, _ = concat_sessions(sessions)
+        total_time = (time.perf_counter_ns() - start_time) / 1e9
+
+        total = statuses.size
+        successful = int((statuses == 200).sum())
         success_rate = successful / total
 
         print(f"\n⚠️  BREAKING POINT TEST (100 usuarios):")
         print(f"   Total queries:  {total}")
         print(f"   Exitosas:       {successful} ({success_rate*100:.1f}%)")
+        print_latency_percentiles(statuses, latencies)
         print(f"   Tiempo total:   {total_time:.2f}s")
         print(f"   Throughput:     {total/total_time:.1f} q/s")
 
@@ -219,38 +315,40 @@ class TestConcurrentLoad:
 
 @pytest.mark.performance
 @pytest.mark.slow
+@pytest.mark.xdist_group("stress")
 class TestSpikeLoad:
     """
     Tests de picos de carga súbitos.
     Metodología: Spike Testing
     """
 
-    def test_sudden_spike_0_to_20_users(self, client):
+    @pytest.mark.asyncio
+    async def test_sudden_spike_0_to_20_users(self, async_client):
         """
         Spike súbito: 0 → 20 usuarios en 1 segundo.
         Objetivo: Sistema debe adaptarse sin fallos.
+
+        Las 20 corrutinas se crean en el mismo tick del event loop, así que
+        arrancan a la vez (un pool de hilos las lanzaría en rampa).
         """
         num_users = 20
-        queries = ["hola", "ayuda", "gracias"] * 10
+        queries = ["hola", "ayuda", "gracias"]
 
-        def rapid_queries():
-            results = []
-            for query in queries[:10]:  # 10 queries por usuario
-                try:
-                    response = client.post("/buscar", json={"texto": query})
-                    results.append(response.status_code == 200)
-                except:
-                    results.append(False)
-            return results
+        batch_size = 10  # 10 queries por usuario, en un solo lote
+        payloads = [batch_payload(distinct_queries(queries, batch_size, f"u{uid}")) for uid in range(num_users)]
+
+        async def rapid_queries(user_id):
+            try:
+                response = await async_client.post("/buscar/batch", content=payloads[user_id])
+                return [response.status_code == 200] * batch_size
+            except REQUEST_ERRORS:
+                return [False] * batch_size
 
         # Spike súbito - todos empiezan al mismo tiempo
-        start = time.time()
-        with ThreadPoolExecutor(max_workers=num_users) as executor:
-            futures = [executor.submit(rapid_queries) for _ in range(num_users)]
-            all_results = []
-            for future in as_completed(futures):
-                all_results.extend(future.result())
-        elapsed = time.time() - start
+        start = time.perf_counter_ns()
+        sessions = await asyncio.gather(*[rapid_queries(uid) for uid in range(num_users)])
+        all_results = [ok for sub in sessions for ok in sub]
+        elapsed = (time.perf_counter_ns() - start) / 1e9
 
         total = len(all_results)
         successful = sum(all_results)
@@ -267,6 +365,7 @@ class TestSpikeLoad:
 
 @pytest.mark.performance
 @pytest.mark.slow
+@pytest.mark.xdist_group("stress")
 class TestSoakTesting:
     """
     Tests de carga prolongada (Soak Testing).
@@ -280,80 +379,89 @@ class TestSoakTesting:
         """
         duration_seconds = 300  # 5 minutos
         num_users = 5
+        rate_per_user = 50  # Queries/segundo objetivo por usuario
 
         queries = ["hola", "ayuda", "gracias", "buenos días"]
 
-        def continuous_user(user_id, stop_time):
-            """Usuario que hace queries continuamente hasta stop_time."""
-            results = []
+        def continuous_user(user_id, stop_time, rate=rate_per_user):
+            """Usuario que hace queries continuamente hasta stop_time, a `rate` queries/s como máximo."""
+            timestamps, latencies, statuses = [], [], []
             query_count = 0
-            while time.time() < stop_time:
-                query = queries[query_count % len(queries)]
+            next_allowed = time.monotonic()
+            while time.perf_counter_ns() < stop_time:
+                # Token bucket: solo espera si va adelantado respecto al ritmo objetivo
+                sleep_for = next_allowed - time.monotonic()
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+                next_allowed += 1 / rate
+
+                # Query distinta en cada request: el pipeline completo, no un acierto de cache
+                payload = buscar_payload(f"{queries[query_count % len(queries)]} u{user_id}-{query_count}")
                 try:
-                    start = time.time()
-                    response = client.post("/buscar", json={"texto": query})
-                    latency = time.time() - start
-
-                    results.append({
-                        "timestamp": start,
-                        "latency": latency,
-                        "status": response.status_code,
-                        "query_num": query_count
-                    })
+                    start = time.perf_counter_ns()
+                    response = client.post("/buscar", content=payload)
+                    latency_ns = time.perf_counter_ns() - start
+
+                    timestamps.append(start)
+                    latencies.append(latency_ns)
+                    statuses.append(response.status_code)
                     query_count += 1
-                    time.sleep(0.1)  # Pequeña pausa entre queries
-                except Exception as e:
-                    results.append({
-                        "timestamp": time.time(),
-                        "latency": 0,
-                        "status": 500,
-                        "error": str(e)
-                    })
-            return results
+                except REQUEST_ERRORS:
+                    timestamps.append(time.perf_counter_ns())
+                    latencies.append(0)
+                    statuses.append(500)
+            return (
+                np.asarray(timestamps, dtype=np.int64),
+                np.asarray(latencies, dtype=np.int64),
+                np.asarray(statuses, dtype=np.int64),
+            )
 
         print(f"\n⏱️  SOAK TEST - Iniciando carga sostenida de 5 minutos...")
         print(f"   {num_users} usuarios haciendo queries continuas...")
 
-        start_time = time.time()
-        stop_time = start_time + duration_seconds
+        start_time = time.perf_counter_ns()
+        stop_time = start_time + duration_seconds * 1_000_000_000
 
         with ThreadPoolExecutor(max_workers=num_users) as executor:
-            futures = [executor.submit(continuous_user, uid, stop_time) for uid in range(num_users)]
-            all_results = []
-            for future in as_completed(futures):
-                all_results.extend(future.result())
+            user = partial(continuous_user, stop_time=stop_time)
+            timestamps, latencies, statuses = concat_sessions(executor.map(user, range(num_users)))
 
-        actual_duration = time.time() - start_time
+        actual_duration = (time.perf_counter_ns() - start_time) / 1e9
+
+        # Descartar los primeros segundos (calentamiento) del análisis
+        warmup_seconds = 10
+        warmup_start = start_time + warmup_seconds * 1_000_000_000
+        after_warmup = timestamps >= warmup_start
+        timestamps, latencies, statuses = timestamps[after_warmup], latencies[after_warmup], statuses[after_warmup]
 
         # Análisis de degradación temporal
-        total = len(all_results)
-        successful = sum(1 for r in all_results if r["status"] == 200)
+        ok = statuses == 200
+        total = statuses.size
+        successful = int(ok.sum())
 
         # Dividir en ventanas de 1 minuto
-        window_size = 60  # segundos
-        windows = {}
-        for r in all_results:
-            if r["status"] == 200:
-                window = int((r["timestamp"] - start_time) / window_size)
-                if window not in windows:
-                    windows[window] = []
-                windows[window].append(r["latency"])
+        window_size = 60 * 1_000_000_000  # 60 segundos, en ns
+        window_ids = (timestamps[ok] - warmup_start) // window_size
+        window_counts = np.bincount(window_ids)
+        window_sums = np.bincount(window_ids, weights=latencies[ok])
+        windows = np.flatnonzero(window_counts)  # Ventanas con al menos una query
+        window_means = window_sums[windows] / window_counts[windows]
 
         print(f"\n📊 SOAK TEST RESULTS:")
         print(f"   Duración real:     {actual_duration:.1f}s")
         print(f"   Total queries:     {total}")
         print(f"   Exitosas:          {successful} ({successful/total*100:.1f}%)")
-        print(f"   Queries/segundo:   {total/actual_duration:.1f}")
+        print(f"   Queries/segundo:   {total/(actual_duration - warmup_seconds):.1f}")
+        print_latency_percentiles(statuses, latencies)
 
         print(f"\n   Análisis temporal (ventanas de 1 minuto):")
-        for window, latencies in sorted(windows.items()):
-            avg_lat = mean(latencies)
-            print(f"     Minuto {window+1}: avg latency = {avg_lat*1000:.2f}ms, queries = {len(latencies)}")
+        for window, avg_lat in zip(windows, window_means):
+            print(f"     Minuto {window+1}: avg latency = {avg_lat/1e6:.2f}ms, queries = {window_counts[window]}")
 
         # Validar que no hay degradación significativa
         if len(windows) >= 2:
-            first_window_avg = mean(windows[0])
-            last_window_avg = mean(windows[max(windows.keys())])
+            first_window_avg = window_means[0]
+            last_window_avg = window_means[-1]
             degradation = (last_window_avg - first_window_avg) / first_window_avg
 
             print(f"\n   Degradación: {degradation*100:.1f}%")
@@ -366,47 +474,65 @@ class TestSoakTesting:
 
 
 @pytest.mark.performance
+@pytest.mark.xdist_group("stress")
 class TestResourceExhaustion:
     """
     Tests de agotamiento de recursos.
     Metodología: Resource Exhaustion Testing
     """
 
-    def test_memory_stability_under_load(self, matcher):
+    def test_memory_stability_under_load(self, uncached_matcher):
         """
         Test de estabilidad de memoria bajo carga.
-        1000 queries para verificar que no hay memory leaks.
+        1000 queries distintas contra el matcher sin cache para verificar que no hay memory leaks
+        (con repeticiones, la deduplicación del lote y el cache ocultarían el crecimiento real).
+        Usa snapshots de tracemalloc (crecimiento por línea de código);
+        el RSS se reporta como métrica secundaria.
         """
         import gc
         import psutil
         import os
+        import tracemalloc
 
         process = psutil.Process(os.getpid())
 
+        queries = distinct_queries(["hola", "ayuda", "gracias", "buenos días"], 1000, "mem")  # 1000 queries
+
         # Memoria inicial
         gc.collect()
         initial_memory = process.memory_info().rss / 1024 / 1024  # MB
-
-        queries = ["hola", "ayuda", "gracias", "buenos días"] * 250  # 1000 queries
-
-        for query in queries:
-            result = matcher.search_similar_phrase(query)
-            assert 0.0 <= result["similitud"] <= 1.0
-
-        # Memoria final
-        gc.collect()
+        tracemalloc.start(25)
+        try:
+            snapshot_before = tracemalloc.take_snapshot()
+
+            results = uncached_matcher.search_similar_batch(queries, batch_size=32)
+            similitudes = np.fromiter((r["similitud"] for r in results), dtype=np.float64)
+            assert similitudes.size == len(queries)
+            assert np.all((similitudes >= 0.0) & (similitudes <= 1.0))
+
+            # Memoria final
+            gc.collect()
+            snapshot_after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
         final_memory = process.memory_info().rss / 1024 / 1024  # MB
 
+        top_stats = snapshot_after.compare_to(snapshot_before, "lineno")
+        python_growth = sum(stat.size_diff for stat in top_stats)
         memory_increase = final_memory - initial_memory
-        memory_increase_pct = (memory_increase / initial_memory) * 100
 
         print(f"\n💾 MEMORY STABILITY TEST:")
-        print(f"   Memoria inicial:  {initial_memory:.2f} MB")
-        print(f"   Memoria final:    {final_memory:.2f} MB")
-        print(f"   Incremento:       {memory_increase:.2f} MB ({memory_increase_pct:.1f}%)")
-
-        # El incremento de memoria no debe ser mayor a 20%
-        assert memory_increase_pct < 20, f"Posible memory leak: {memory_increase_pct:.1f}% incremento"
+        print(f"   Crecimiento Python (tracemalloc): {python_growth / 1024 / 1024:.2f} MB")
+        print(f"   Top 10 líneas con más crecimiento:")
+        for stat in top_stats[:10]:
+            print(f"     {stat}")
+        print(f"   RSS inicial:  {initial_memory:.2f} MB")
+        print(f"   RSS final:    {final_memory:.2f} MB")
+        print(f"   Incremento:   {memory_increase:.2f} MB")
+
+        # Las asignaciones Python retenidas tras 1000 queries no deben superar 50 MB
+        assert python_growth < 50 * 1024 * 1024, \
+            f"Posible memory leak: {python_growth / 1024 / 1024:.1f} MB retenidos"
 
     def test_error_recovery(self, client):
         """
@@ -425,7 +551,7 @@ class TestResourceExhaustion:
         for q in invalid_queries:
             try:
                 client.post("/buscar", json={"texto": q})
-            except:
+            except REQUEST_ERRORS:
                 pass  # Esperamos errores
 
         # Fase 3: Queries válidas de nuevo (recovery)
@@ -447,6 +573,7 @@ class TestResourceExhaustion:
 
 
 @pytest.mark.performance
+@pytest.mark.xdist_group("stress")
 class TestGradualDegradation:
     """
     Tests de degradación gradual.
@@ -455,40 +582,72 @@ class TestGradualDegradation:
 
     def test_increasing_load_degradation_curve(self, client):
         """
-        Curva de degradación con carga incremental.
-        1 → 5 → 10 → 20 → 50 usuarios.
+        Curva de degradación con carga adaptativa.
+        Duplica usuarios (1 → 2 → 4 → ...) hasta que el P99 supera el SLA y luego
+        bisecta entre el último nivel bueno y el primero que falló para ubicar el codo.
         """
-        load_levels = [1, 5, 10, 20, 50]
-        results_by_load = {}
-
-        for num_users in load_levels:
-            queries_per_user = 10
-
-            def user_queries():
-                successful = 0
-                for i in range(queries_per_user):
-                    try:
-                        response = client.post("/buscar", json={"texto": "hola"})
-                        if response.status_code == 200:
-                            successful += 1
-                    except:
-                        pass
-                return successful
-
-            with ThreadPoolExecutor(max_workers=num_users) as executor:
-                futures = [executor.submit(user_queries) for _ in range(num_users)]
-                total_successful = sum(f.result() for f in as_completed(futures))
+        sla_p99_ns = 500_000_000  # 500 ms
+        max_users = 64
+        queries_per_user = 10
+        curve = []  # (usuarios, tasa de éxito, p99 en ns)
 
-            total_queries = num_users * queries_per_user
-            success_rate = total_successful / total_queries
-            results_by_load[num_users] = success_rate
+        def user_queries(user_id):
+            # Arrays preasignados y escritos por índice: sin listas temporales por query
+            statuses = np.full(queries_per_user, 500, dtype=np.int64)
+            latencies = np.zeros(queries_per_user, dtype=np.int64)
+            payloads = [buscar_payload(q) for q in distinct_queries(["hola"], queries_per_user, f"u{user_id}")]
+            for i in range(queries_per_user):
+                start = time.perf_counter_ns()
+                try:
+                    statuses[i] = client.post("/buscar", content=payloads[i]).status_code
+                except REQUEST_ERRORS:
+                    pass
+                latencies[i] = time.perf_counter_ns() - start
+            return session_arrays(statuses, latencies, np.ones(queries_per_user, dtype=bool))
 
-        print(f"\n📈 DEGRADATION CURVE:")
-        for load, success in results_by_load.items():
-            print(f"   {load:3d} usuarios: {success*100:.1f}% éxito")
+        def measure(num_users):
+            with ThreadPoolExecutor(max_workers=num_users) as executor:
+                statuses, latencies, _ = concat_sessions(executor.map(user_queries, range(num_users)))
+            success_rate = float((statuses == 200).mean())
+            p99 = int(np.percentile(latencies, 99, method="nearest"))
+            curve.append((num_users, success_rate, p99))
+            return success_rate, p99
+
+        def within_sla(num_users):
+            # Histéresis: un nivel solo se considera saturado si dos muestras seguidas fallan
+            for _ in range(2):
+                _, p99 = measure(num_users)
+                if p99 <= sla_p99_ns:
+                    return True
+            return False
+
+        # Fase 1: duplicar usuarios hasta romper el SLA
+        good, bad = 0, None
+        num_users = 1
+        while num_users <= max_users:
+            if not within_sla(num_users):
+                bad = num_users
+                break
+            good = num_users
+            num_users *= 2
+
+        # Fase 2: bisección entre el último nivel bueno y el que falló
+        if bad is not None:
+            while bad - good > 1:
+                mid = (good + bad) // 2
+                if within_sla(mid):
+                    good = mid
+                else:
+                    bad = mid
+
+        curve.sort()
+        print(f"\n📈 DEGRADATION CURVE (SLA P99 <= {sla_p99_ns/1e6:.0f}ms):")
+        for users, success, p99 in curve:
+            print(f"   {users:3d} usuarios: {success*100:.1f}% éxito, P99 = {p99/1e6:.2f}ms")
+        print(f"   Máximo nivel dentro del SLA: {good} usuarios")
 
         # Validar que la degradación es gradual, no abrupta
-        rates = list(results_by_load.values())
-        for i in range(len(rates) - 1):
-            drop = rates[i] - rates[i+1]
-            assert drop < 0.30, f"Degradación abrupta detectada: {drop*100:.1f}%"
+        rates = np.fromiter((success for _, success, _ in curve), dtype=np.float64)
+        if rates.size >= 2:
+            worst_drop = -np.diff(rates).min()
+            assert worst_drop < 0.30, f"Degradación abrupta detectada: {worst_drop*100:.1f}%"
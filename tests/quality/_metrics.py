@@ -0,0 +1,52 @@
+"""
+Métricas de clasificación compartidas por los tests de calidad semántica.
+"""
+
+import numpy as np
+
+# Etiquetas de la matriz de confusión; None = se activó el deletreo
+LABELS = ("A", "B", "C", None)
+LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+
+
+def label_code(result):
+    """Código entero del resultado de una búsqueda (deletreo -> código de None)."""
+    return LABEL_CODES[None] if result["deletreo_activado"] else LABEL_CODES.get(result["grupo"], LABEL_CODES[None])
+
+
+def prf1(tp, fp, fn):
+    """
+    Precision, recall y F1 por grupo, vectorizados y sin divisiones por cero.
+
+    Args:
+        tp: Verdaderos positivos por grupo
+        fp: Falsos positivos por grupo
+        fn: Falsos negativos por grupo
+
+    Returns:
+        Tupla (precision, recall, f1) de arrays del mismo largo que tp
+    """
+    tp = np.asarray(tp, dtype=np.float64)
+    precision = tp / np.maximum(tp + fp, 1)
+    recall = tp / np.maximum(tp + fn, 1)
+    f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-9)
+    return precision, recall, f1
+
+
+def confusion_counts(matrix, n_groups=3):
+    """
+    TP, FP y FN por grupo a partir de una matriz de confusión [predicted][actual].
+
+    Filas o columnas extra (p. ej. deletreo) solo cuentan como fallos.
+
+    Args:
+        matrix: Matriz de confusión indexada como [predicted][actual]
+        n_groups: Número de grupos reales (las primeras filas/columnas)
+
+    Returns:
+        Tupla (tp, fp, fn) de arrays de n_groups elementos
+    """
+    tp = np.diag(matrix)[:n_groups]
+    fp = matrix[:n_groups].sum(axis=1) - tp
+    fn = matrix[:, :n_groups].sum(axis=0) - tp
+    return tp, fp, fn
@@ -0,0 +1,66 @@
+"""
+Fixtures compartidos por los tests de calidad semántica.
+"""
+
+import pytest
+
+# Métricas numéricas de los tests semánticos, acumuladas en la config de la sesión
+_METRICS_KEY = pytest.StashKey[dict]()
+
+
+@pytest.fixture(scope="session")
+def matcher(matcher_factory):
+    """
+    Matcher para tests de calidad semántica, sin cache de consultas.
+    Las métricas deben medir el modelo, no depender del orden de los tests.
+    """
+    return matcher_factory(use_query_cache=False)
+
+
+@pytest.fixture(scope="session")
+def cached_search(matcher):
+    """
+    Búsqueda memoizada por query para toda la sesión de tests semánticos.
+
+    Las mismas queries ("hola", "ayuda", ...) se repiten en muchos tests; así cada
+    una pasa por el modelo una sola vez. Devuelve una copia del resultado para que
+    ningún test altere el de otro.
+
+    `cached_search.prefetch(queries)` precarga varias queries con una sola
+    llamada a search_similar_batch (un único encode para todo el lote).
+    """
+    results = {}
+
+    def search(query):
+        if query not in results:
+            results[query] = matcher.search_similar_phrase(query)
+        return dict(results[query])
+
+    def prefetch(queries):
+        pending = [query for query in dict.fromkeys(queries) if query not in results]
+        if pending:
+            results.update(zip(pending, matcher.search_similar_batch(pending)))
+
+    search.prefetch = prefetch
+    return search
+
+
+@pytest.fixture(scope="session")
+def metrics(request):
+    """
+    Diccionario compartido donde los tests registran sus métricas (nombre -> valor).
+    Se imprime una sola vez al final de la sesión en vez de hacer print por test.
+    """
+    return request.config.stash.setdefault(_METRICS_KEY, {})
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Imprime las métricas semánticas registradas durante la sesión."""
+    metrics = config.stash.get(_METRICS_KEY, None)
+    if not metrics:
+        return
+    terminalreporter.section("📊 Métricas de calidad semántica")
+    width = max(len(name) for name in metrics)
+    for name, value in metrics.items():
+        formatted = f"{value:.4f}" if isinstance(value, float) else str(value)
+        terminalreporter.write_line(f"{name:<{width}}  {formatted}")
@@ -10,20 +10,53 @@ Metodologías implementadas:
 """
 
 import pytest
+import statistics
 import numpy as np
-from collections import defaultdict
-from app.matcher_improved import ImprovedPhraseMatcher
+from tests.quality._metrics import LABELS, LABEL_CODES, label_code, prf1, confusion_counts
 
 
-@pytest.fixture(scope="module")
-def matcher():
-    m = ImprovedPhraseMatcher(
-        model_type="multilingual_balanced",
-        use_reranking=True,
-        use_synonym_expansion=True
+@pytest.fixture(scope="module", autouse=True)
+def _prefetch_queries(cached_search):
+    """Codifica en un solo lote todas las queries fijas de este módulo."""
+    cached_search.prefetch(
+        [query for query, *_ in TestGoldenDataset.GOLDEN_CASES]
+        + [query for query, _ in TestConfusionMatrixDetailed.TEST_DATASET]
     )
-    m.initialize()
-    return m
+
+
+def _run_dataset(search, dataset):
+    """
+    Ejecuta la búsqueda sobre un dataset (una sola pasada) y codifica los resultados.
+
+    Args:
+        search: Función de búsqueda (query -> resultado)
+        dataset: Lista de tuplas (query, grupo esperado)
+
+    Returns:
+        Tupla (pred_codes, exp_codes, sims, deletreo) de arrays numpy
+    """
+    n = len(dataset)
+    pred_codes = np.empty(n, dtype=np.int8)
+    exp_codes = np.empty(n, dtype=np.int8)
+    sims = np.empty(n, dtype=np.float32)
+    deletreo = np.empty(n, dtype=np.bool_)
+
+    for i, (query, expected) in enumerate(dataset):
+        result = search(query)
+        # Si activa deletreo, contar como "None"
+        pred_codes[i] = label_code(result)
+        exp_codes[i] = LABEL_CODES[expected]
+        sims[i] = result["similitud"]
+        deletreo[i] = result["deletreo_activado"]
+
+    return pred_codes, exp_codes, sims, deletreo
+
+
+def _confusion_matrix(pred_codes, exp_codes):
+    """Matriz de confusión 4x4 indexada como [predicted][actual]."""
+    n = len(LABELS)
+    flat = pred_codes.astype(np.intp) * n + exp_codes
+    return np.bincount(flat, minlength=n * n).reshape(n, n)
 
 
 @pytest.mark.semantic
@@ -64,12 +97,26 @@ class TestGoldenDataset:
         ("ayda", "A", 0.50, "typo"),    # puede deletrear
     ]
 
+    # Columnas del dataset como arrays (una por campo), construidas una sola vez
+    _queries, _grupos, _min_sims, _categorias = zip(*GOLDEN_CASES)
+    QUERIES = np.array(_queries)
+    EXPECTED = np.array([LABEL_CODES[grupo] for grupo in _grupos], dtype=np.int8)
+    MIN_SIM = np.array(_min_sims, dtype=np.float64)
+    IS_TYPO = np.array(_categorias) == "typo"
+
+    @pytest.fixture(scope="class")
+    def golden_results(self, cached_search):
+        """Resultados de todos los GOLDEN_CASES, obtenidos en un solo lote."""
+        queries = self.QUERIES.tolist()
+        cached_search.prefetch(queries)
+        return {query: cached_search(query) for query in queries}
+
     @pytest.mark.parametrize("query,expected_grupo,min_sim,categoria", GOLDEN_CASES)
-    def test_golden_case(self, matcher, query, expected_grupo, min_sim, categoria):
+    def test_golden_case(self, golden_results, query, expected_grupo, min_sim, categoria):
         """
         CRÍTICO: Todos los casos golden DEBEN pasar.
         """
-        result = matcher.search_similar_phrase(query)
+        result = dict(golden_results[query])
 
         # Si activa deletreo, skip para typos (aceptable)
         if result["deletreo_activado"] and categoria == "typo":
@@ -91,37 +138,33 @@ class TestGoldenDataset:
         # Validar rango
         assert 0.0 <= result["similitud"] <= 1.0
 
-    def test_golden_dataset_accuracy(self, matcher):
+    def test_golden_dataset_accuracy(self, golden_results, metrics):
         """
         Accuracy global del golden dataset.
         Objetivo: 100% (estos son casos que DEBEN funcionar)
         """
-        correct = 0
-        total = 0
-        errors = []
-
-        for query, expected_grupo, min_sim, categoria in self.GOLDEN_CASES:
-            result = matcher.search_similar_phrase(query)
-
-            # Si es typo y activa deletreo, OK
-            if categoria == "typo" and result["deletreo_activado"]:
-                total += 1
-                correct += 1
-                continue
-
-            total += 1
-            if result["grupo"] == expected_grupo and result["similitud"] >= min_sim:
-                correct += 1
-            else:
-                errors.append({
-                    "query": query,
-                    "expected": expected_grupo,
-                    "got": result["grupo"],
-                    "sim": result["similitud"]
-                })
+        results = [golden_results[query] for query in self.QUERIES.tolist()]
+        grupos = np.array([LABEL_CODES.get(r["grupo"], LABEL_CODES[None]) for r in results], dtype=np.int8)
+        sims = np.array([r["similitud"] for r in results], dtype=np.float64)
+        deletreo = np.array([r["deletreo_activado"] for r in results], dtype=bool)
+
+        # Si es typo y activa deletreo, OK; si no, grupo correcto y similitud mínima
+        typo_ok = self.IS_TYPO & deletreo
+        ok = typo_ok | ((grupos == self.EXPECTED) & (sims >= self.MIN_SIM))
+        total = ok.size
+        correct = int(ok.sum())
+        errors = [
+            {
+                "query": self.QUERIES[i],
+                "expected": LABELS[self.EXPECTED[i]],
+                "got": results[i]["grupo"],
+                "sim": sims[i]
+            }
+            for i in np.flatnonzero(~ok)
+        ]
 
         accuracy = correct / total
-        print(f"\n📊 Golden Dataset Accuracy: {accuracy:.2%} ({correct}/{total})")
+        metrics["golden_accuracy"] = accuracy
 
         if errors:
             print("\n❌ Errores encontrados:")
@@ -177,108 +220,57 @@ class TestConfusionMatrixDetailed:
         ("perdon", "C")
     ]
 
-    def test_full_confusion_matrix(self, matcher):
+    # Mismo dataset como array estructurado (columnas "q" y "g")
+    DATASET = np.array(TEST_DATASET, dtype=[("q", "U32"), ("g", "U1")])
+
+    @pytest.fixture(scope="class")
+    def confusion(self, cached_search):
+        """Una sola pasada por TEST_DATASET, compartida por los tests de la clase."""
+        cached_search.prefetch(self.DATASET["q"].tolist())
+        pred_codes, exp_codes, _, _ = _run_dataset(cached_search, self.DATASET.tolist())
+        return _confusion_matrix(pred_codes, exp_codes)
+
+    def test_full_confusion_matrix(self, confusion, metrics):
         """
         Calcular matriz de confusión completa.
         """
         # Matriz: [predicted][actual] = count
-        matrix = defaultdict(lambda: defaultdict(int))
-        total_by_group = defaultdict(int)
-        correct_by_group = defaultdict(int)
-
-        for query, expected in self.TEST_DATASET:
-            result = matcher.search_similar_phrase(query)
-
-            # Si activa deletreo, contar como "None"
-            predicted = result["grupo"] if not result["deletreo_activado"] else None
-
-            matrix[predicted][expected] += 1
-            total_by_group[expected] += 1
-
-            if predicted == expected:
-                correct_by_group[expected] += 1
-
-        # Imprimir matriz
-        print("\n📊 MATRIZ DE CONFUSIÓN:")
-        print("=" * 50)
-        print(f"{'Predicted →':<15} {'A':<10} {'B':<10} {'C':<10} {'None':<10}")
-        print("-" * 50)
-
-        for pred in ["A", "B", "C", None]:
-            row = f"{pred if pred else 'Deletreo':<15}"
-            for actual in ["A", "B", "C"]:
-                count = matrix[pred][actual]
-                row += f"{count:<10}"
-            print(row)
-
-        # Calcular métricas
-        print("\n📊 MÉTRICAS POR GRUPO:")
-        print("=" * 50)
+        matrix = confusion
 
-        for grupo in ["A", "B", "C"]:
-            total = total_by_group[grupo]
-            correct = correct_by_group[grupo]
-            accuracy = correct / total if total > 0 else 0
+        # Registrar matriz (filas: A, B, C, Deletreo; columnas: A, B, C)
+        metrics["confusion_matrix"] = matrix[:, :3].tolist()
 
-            # Precision: de lo que predije como grupo X, cuántos eran correctos
-            predicted_as_grupo = sum(matrix[grupo].values())
-            precision = matrix[grupo][grupo] / predicted_as_grupo if predicted_as_grupo > 0 else 0
+        # Casos por grupo: cada columna de la matriz debe sumar lo mismo que el dataset
+        grupos, support = np.unique(self.DATASET["g"], return_counts=True)
+        assert grupos.tolist() == list(LABELS[:3])
+        assert np.array_equal(matrix[:, :3].sum(axis=0), support)
 
-            # Recall: de todos los del grupo X, cuántos detecté
-            recall = correct / total if total > 0 else 0
+        # Calcular métricas (accuracy por grupo = recall)
+        precision, recall, f1 = prf1(*confusion_counts(matrix))
+        accuracy = recall
 
-            # F1-Score
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-
-            print(f"\nGrupo {grupo}:")
-            print(f"  Accuracy:  {accuracy:.2%}")
-            print(f"  Precision: {precision:.2%}")
-            print(f"  Recall:    {recall:.2%}")
-            print(f"  F1-Score:  {f1:.2%}")
+        for i, grupo in enumerate(LABELS[:3]):
+            metrics[f"group_{grupo}_accuracy"] = float(accuracy[i])
+            metrics[f"group_{grupo}_f1"] = float(f1[i])
 
             # Validaciones
-            assert accuracy >= 0.60, f"Accuracy grupo {grupo} muy baja: {accuracy:.2%}"
+            assert accuracy[i] >= 0.60, f"Accuracy grupo {grupo} muy baja: {accuracy[i]:.2%}"
 
-    def test_per_group_precision_recall(self, matcher):
+    def test_per_group_precision_recall(self, confusion, metrics):
         """
         Precision y Recall por grupo (métricas estándar de ML).
         """
-        true_positives = defaultdict(int)
-        false_positives = defaultdict(int)
-        false_negatives = defaultdict(int)
-
-        for query, expected in self.TEST_DATASET:
-            result = matcher.search_similar_phrase(query)
-            predicted = result["grupo"] if not result["deletreo_activado"] else None
-
-            if predicted == expected:
-                true_positives[expected] += 1
-            elif predicted is not None:
-                false_positives[predicted] += 1
-                false_negatives[expected] += 1
-            else:
-                # Deletreó cuando no debía
-                false_negatives[expected] += 1
-
-        print("\n📊 PRECISION Y RECALL:")
-        for grupo in ["A", "B", "C"]:
-            tp = true_positives[grupo]
-            fp = false_positives[grupo]
-            fn = false_negatives[grupo]
-
-            precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-
-            print(f"\nGrupo {grupo}:")
-            print(f"  TP={tp}, FP={fp}, FN={fn}")
-            print(f"  Precision: {precision:.2%}")
-            print(f"  Recall:    {recall:.2%}")
-            print(f"  F1-Score:  {f1:.2%}")
+        tp, fp, fn = confusion_counts(confusion)
+        precision, recall, f1 = prf1(tp, fp, fn)
+
+        for i, grupo in enumerate(LABELS[:3]):
+            metrics[f"group_{grupo}_tp_fp_fn"] = (int(tp[i]), int(fp[i]), int(fn[i]))
+            metrics[f"group_{grupo}_precision"] = float(precision[i])
+            metrics[f"group_{grupo}_recall"] = float(recall[i])
 
             # Objetivo: >70% en ambas métricas
-            assert precision >= 0.60, f"Precision grupo {grupo}: {precision:.2%} < 60%"
-            assert recall >= 0.60, f"Recall grupo {grupo}: {recall:.2%} < 60%"
+            assert precision[i] >= 0.60, f"Precision grupo {grupo}: {precision[i]:.2%} < 60%"
+            assert recall[i] >= 0.60, f"Recall grupo {grupo}: {recall[i]:.2%} < 60%"
 
 
 @pytest.mark.semantic
@@ -288,7 +280,7 @@ class TestSimilarityDistribution:
     Metodología: Statistical distribution analysis
     """
 
-    def test_similarity_statistics(self, matcher):
+    def test_similarity_statistics(self, cached_search, metrics):
         """
         Analizar estadísticas de similitud (media, std, percentiles).
         """
@@ -303,29 +295,20 @@ class TestSimilarityDistribution:
             "socorro", "auxilio", "saludos",
         ]
 
-        similarities = []
-        for query in queries:
-            result = matcher.search_similar_phrase(query)
-            if not result["deletreo_activado"]:
-                similarities.append(result["similitud"])
-
-        # Estadísticas
-        mean = np.mean(similarities)
-        std = np.std(similarities)
-        median = np.median(similarities)
-        p25 = np.percentile(similarities, 25)
-        p75 = np.percentile(similarities, 75)
-        min_sim = np.min(similarities)
-        max_sim = np.max(similarities)
-
-        print(f"\n📊 DISTRIBUCIÓN DE SIMILITUDES:")
-        print(f"  Media:    {mean:.3f}")
-        print(f"  Mediana:  {median:.3f}")
-        print(f"  Std Dev:  {std:.3f}")
-        print(f"  Min:      {min_sim:.3f}")
-        print(f"  P25:      {p25:.3f}")
-        print(f"  P75:      {p75:.3f}")
-        print(f"  Max:      {max_sim:.3f}")
+        cached_search.prefetch(queries)
+        results = [cached_search(query) for query in queries]
+        similarities = [r["similitud"] for r in results if not r["deletreo_activado"]]
+
+        # Estadísticas (pocos valores: el módulo statistics basta, sin arrays)
+        # method="inclusive" interpola igual que np.percentile
+        p25, median, p75 = statistics.quantiles(similarities, n=4, method="inclusive")
+        mean = statistics.fmean(similarities)
+        std = statistics.pstdev(similarities)
+        min_sim, max_sim = min(similarities), max(similarities)
+
+        for name, value in [("mean", mean), ("median", median), ("std", std), ("min", min_sim),
+                            ("p25", p25), ("p75", p75), ("max", max_sim)]:
+            metrics[f"similarity_{name}"] = float(value)
 
         # Validaciones
         assert min_sim >= 0.0, "Similitud mínima negativa!"
@@ -340,7 +323,7 @@ class TestErrorAnalysis:
     Metodología: Qualitative error analysis
     """
 
-    def test_identify_failure_patterns(self, matcher):
+    def test_identify_failure_patterns(self, cached_search):
         """
         Identificar patrones en los fallos.
         """
@@ -354,7 +337,7 @@ class TestErrorAnalysis:
 
         failures = []
         for query, expected, reason in test_cases:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
             actual = result["grupo"] if not result["deletreo_activado"] else None
 
             if actual != expected:
@@ -380,13 +363,24 @@ class TestErrorAnalysis:
         print(f"\n📝 Casos edge documentados: {len(failures)}")
 
 
+def _add_errors(text, n):
+    """Introduce N errores en un texto (quitando caracteres de los extremos)."""
+    if n == 0:
+        return text
+    if n == 1:
+        return text[1:] if len(text) > 1 else "x"  # quitar primer char
+    if n == 2:
+        return text[1:-1] if len(text) > 2 else "x"  # quitar primero y último
+    return "xxx"  # muchos errores
+
+
 @pytest.mark.semantic
 class TestRobustnessMetrics:
     """
     Métricas de robustez del sistema.
     """
 
-    def test_robustness_to_typos_metric(self, matcher):
+    def test_robustness_to_typos_metric(self, cached_search, metrics):
         """
         Medir robustez ante errores ortográficos.
         Métrica: % de typos que aún se clasifican correctamente
@@ -400,25 +394,19 @@ class TestRobustnessMetrics:
             ("gracias", "graias", "C"),
         ]
 
-        correct_with_typo = 0
-        total_typos = 0
-
-        for correct, typo, expected_grupo in typo_pairs:
-            result = matcher.search_similar_phrase(typo)
-            total_typos += 1
-
-            if not result["deletreo_activado"] and result["grupo"] == expected_grupo:
-                correct_with_typo += 1
+        # Un solo lote para todos los typos; acierto = grupo correcto sin deletreo
+        dataset = [(typo, expected_grupo) for _, typo, expected_grupo in typo_pairs]
+        cached_search.prefetch([typo for typo, _ in dataset])
+        pred_codes, exp_codes, _, _ = _run_dataset(cached_search, dataset)
 
-        robustness_rate = correct_with_typo / total_typos
-        print(f"\n📊 Tasa de Robustez ante Typos: {robustness_rate:.2%}")
-        print(f"   {correct_with_typo}/{total_typos} typos clasificados correctamente")
+        robustness_rate = float((pred_codes == exp_codes).mean())
+        metrics["typo_robustness"] = robustness_rate
 
         # Objetivo: >50% de typos manejados correctamente
         assert robustness_rate >= 0.40, \
             f"Robustez muy baja: {robustness_rate:.2%}"
 
-    def test_degradation_curve(self, matcher):
+    def test_degradation_curve(self, cached_search, metrics):
         """
         Curva de degradación: cómo baja la accuracy con más errores.
         """
@@ -428,33 +416,26 @@ class TestRobustnessMetrics:
             ("gracias", "C"),
         ]
 
-        # Función para introducir N errores
-        def add_errors(text, n):
-            if n == 0:
-                return text
-            if n == 1:
-                return text[1:] if len(text) > 1 else "x"  # quitar primer char
-            if n == 2:
-                return text[1:-1] if len(text) > 2 else "x"  # quitar primero y último
-            return "xxx"  # muchos errores
+        levels = [0, 1, 2, 3]
 
-        degradation = {0: 0, 1: 0, 2: 0, 3: 0}
+        # Todas las variantes corruptas (fila = query, columna = nivel), en un solo lote
+        corrupted = [[_add_errors(query, n) for n in levels] for query, _ in base_queries]
+        cached_search.prefetch([text for row in corrupted for text in row])
 
-        for base_query, expected_grupo in base_queries:
-            for n_errors in [0, 1, 2, 3]:
-                corrupted = add_errors(base_query, n_errors)
-                result = matcher.search_similar_phrase(corrupted)
+        hits = np.zeros((len(base_queries), len(levels)), dtype=np.int32)
+        for i, (_, expected_grupo) in enumerate(base_queries):
+            for j, text in enumerate(corrupted[i]):
+                result = cached_search(text)
+                hits[i, j] = not result["deletreo_activado"] and result["grupo"] == expected_grupo
 
-                if not result["deletreo_activado"] and result["grupo"] == expected_grupo:
-                    degradation[n_errors] += 1
+        degradation = dict(zip(levels, hits.sum(axis=0).tolist()))
 
         # Normalizar
         total_per_level = len(base_queries)
         degradation_rates = {k: v/total_per_level for k, v in degradation.items()}
 
-        print(f"\n📊 CURVA DE DEGRADACIÓN:")
         for n_errors, rate in degradation_rates.items():
-            print(f"  {n_errors} errores: {rate:.1%} accuracy")
+            metrics[f"degradation_accuracy_{n_errors}_errors"] = rate
 
         # La accuracy debe bajar gradualmente
         assert degradation_rates[0] >= degradation_rates[1] >= degradation_rates[2]
@@ -4,26 +4,15 @@ Validan la precisión del modelo de embeddings y clasificación.
 """
 
 import pytest
-from app.matcher_improved import ImprovedPhraseMatcher
-
-
-@pytest.fixture(scope="module")
-def matcher():
-    """Matcher para tests de calidad semántica."""
-    m = ImprovedPhraseMatcher(
-        model_type="multilingual_balanced",
-        use_reranking=True,
-        use_synonym_expansion=True
-    )
-    m.initialize()
-    return m
+import numpy as np
+from tests.quality._metrics import LABELS, LABEL_CODES, label_code, prf1, confusion_counts
 
 
 @pytest.mark.semantic
 class TestSemanticAccuracy:
     """Tests de precisión semántica con dataset conocido."""
 
-    @pytest.mark.parametrize("query,expected_grupo,min_similitud", [
+    CASES = [
         # Grupo A - Emergencia
         ("necesito ayuda", "A", 0.70),
         ("ayuda por favor", "A", 0.85),
@@ -42,12 +31,24 @@ class TestSemanticAccuracy:
         ("gracias", "C", 0.85),
         ("muchas gracias", "C", 0.85),
         ("te lo agradezco", "C", 0.65),
-    ])
-    def test_semantic_classification_accuracy(self, matcher, query, expected_grupo, min_similitud):
+    ]
+
+    @pytest.fixture(scope="class")
+    def results(self, cached_search):
+        """
+        Resultados de todos los CASES en un solo lote: la decisión de skip por
+        deletreo se toma sobre un resultado ya calculado, sin un encode por caso.
+        """
+        queries = [query for query, *_ in self.CASES]
+        cached_search.prefetch(queries)
+        return {query: cached_search(query) for query in queries}
+
+    @pytest.mark.parametrize("query,expected_grupo,min_similitud", CASES)
+    def test_semantic_classification_accuracy(self, results, query, expected_grupo, min_similitud):
         """
         Valida que queries se clasifiquen correctamente con similitud mínima.
         """
-        result = matcher.search_similar_phrase(query)
+        result = dict(results[query])
 
         # Si activa deletreo, skip
         if result["deletreo_activado"]:
@@ -64,7 +65,7 @@ class TestSemanticAccuracy:
 class TestSemanticVariations:
     """Tests de robustez semántica con variaciones lingüísticas."""
 
-    def test_synonyms_recognition(self, matcher):
+    def test_synonyms_recognition(self, cached_search):
         """
         Sinónimos deben clasificarse en el mismo grupo.
         """
@@ -77,7 +78,7 @@ class TestSemanticVariations:
         for synonyms, expected_grupo in synonym_groups:
             results = []
             for word in synonyms:
-                result = matcher.search_similar_phrase(word)
+                result = cached_search(word)
                 if not result["deletreo_activado"]:
                     results.append(result["grupo"])
 
@@ -88,7 +89,7 @@ class TestSemanticVariations:
                 assert accuracy >= 0.70, \
                     f"Sinónimos de grupo {expected_grupo}: solo {accuracy:.0%} correctos"
 
-    def test_case_insensitivity(self, matcher):
+    def test_case_insensitivity(self, cached_search):
         """
         Mayúsculas/minúsculas no deben afectar clasificación.
         """
@@ -101,7 +102,7 @@ class TestSemanticVariations:
         for variations in test_cases:
             grupos = []
             for query in variations:
-                result = matcher.search_similar_phrase(query)
+                result = cached_search(query)
                 if not result["deletreo_activado"]:
                     grupos.append(result["grupo"])
 
@@ -110,7 +111,7 @@ class TestSemanticVariations:
                 assert len(set(grupos)) == 1, \
                     f"Variaciones de caso dieron grupos diferentes: {grupos}"
 
-    def test_accent_robustness(self, matcher):
+    def test_accent_robustness(self, cached_search):
         """
         Acentos no deben afectar significativamente la clasificación.
         """
@@ -121,8 +122,8 @@ class TestSemanticVariations:
         ]
 
         for without_accent, with_accent in test_pairs:
-            result1 = matcher.search_similar_phrase(without_accent)
-            result2 = matcher.search_similar_phrase(with_accent)
+            result1 = cached_search(without_accent)
+            result2 = cached_search(with_accent)
 
             # Si ambos se clasifican (no deletreo), deben dar mismo grupo
             if not result1["deletreo_activado"] and not result2["deletreo_activado"]:
@@ -134,7 +135,7 @@ class TestSemanticVariations:
 class TestConfusionMatrix:
     """Tests para calcular matriz de confusión y métricas de calidad."""
 
-    def test_classification_accuracy_overall(self, matcher):
+    def test_classification_accuracy_overall(self, cached_search, metrics):
         """
         Calcula accuracy global del clasificador.
         Objetivo: >95%
@@ -156,7 +157,7 @@ class TestConfusionMatrix:
         total = 0
 
         for query, expected in test_dataset:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
 
             # Solo contar si no activa deletreo
             if not result["deletreo_activado"]:
@@ -166,11 +167,11 @@ class TestConfusionMatrix:
 
         if total > 0:
             accuracy = correct / total
-            print(f"\n📊 Accuracy global: {accuracy:.2%} ({correct}/{total})")
+            metrics["accuracy_overall"] = accuracy
             assert accuracy >= 0.85, \
                 f"Accuracy {accuracy:.2%} por debajo del objetivo 85%"
 
-    def test_per_group_precision(self, matcher):
+    def test_per_group_precision(self, cached_search, metrics):
         """
         Calcula precision por grupo.
         Precision = True Positives / (True Positives + False Positives)
@@ -186,34 +187,28 @@ class TestConfusionMatrix:
             ("muchas gracias", "C"),
         ]
 
-        # Contador: grupo_predicho -> {grupo_real: count}
-        predictions = {"A": {}, "B": {}, "C": {}}
+        # Contador: [grupo_predicho][grupo_real] = count (fila extra: deletreo)
+        grupos = LABELS[:3]
+        predictions = np.zeros((len(LABELS), 3), dtype=np.int32)
 
         for query, expected in test_dataset:
-            result = matcher.search_similar_phrase(query)
-
-            if not result["deletreo_activado"]:
-                predicted = result["grupo"]
-                if expected not in predictions[predicted]:
-                    predictions[predicted][expected] = 0
-                predictions[predicted][expected] += 1
+            predictions[label_code(cached_search(query)), LABEL_CODES[expected]] += 1
 
         # Calcular precision por grupo
-        for grupo in ["A", "B", "C"]:
-            total_predicted = sum(predictions[grupo].values())
-            if total_predicted > 0:
-                true_positives = predictions[grupo].get(grupo, 0)
-                precision = true_positives / total_predicted
-                print(f"\n📊 Precision Grupo {grupo}: {precision:.2%}")
-                assert precision >= 0.70, \
-                    f"Precision grupo {grupo}: {precision:.2%} < 70%"
+        total_predicted = predictions.sum(axis=1)
+        precision, _, _ = prf1(*confusion_counts(predictions))
+        for i, grupo in enumerate(grupos):
+            if total_predicted[i] > 0:
+                metrics[f"group_{grupo}_precision_basic"] = float(precision[i])
+                assert precision[i] >= 0.70, \
+                    f"Precision grupo {grupo}: {precision[i]:.2%} < 70%"
 
 
 @pytest.mark.semantic
 class TestSimilarityDistribution:
     """Tests para analizar distribución de similitudes."""
 
-    def test_exact_matches_high_similarity(self, matcher):
+    def test_exact_matches_high_similarity(self, cached_search):
         """
         Matches exactos deben tener similitud muy alta (>0.95).
         """
@@ -224,7 +219,7 @@ class TestSimilarityDistribution:
         ]
 
         for query in exact_matches:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
 
             assert not result["deletreo_activado"], \
                 f"Match exacto '{query}' no debería activar deletreo"
@@ -233,7 +228,7 @@ class TestSimilarityDistribution:
             assert result["similitud"] <= 1.0, \
                 f"Match exacto '{query}' excede 1.0: {result['similitud']:.2f}"
 
-    def test_partial_matches_medium_similarity(self, matcher):
+    def test_partial_matches_medium_similarity(self, cached_search):
         """
         Matches parciales deben tener similitud media (0.60-0.90).
         """
@@ -244,13 +239,13 @@ class TestSimilarityDistribution:
         ]
 
         for query in partial_matches:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
 
             if not result["deletreo_activado"]:
                 assert 0.50 <= result["similitud"] <= 0.95, \
                     f"Match parcial '{query}' fuera de rango medio: {result['similitud']:.2f}"
 
-    def test_no_matches_low_similarity(self, matcher):
+    def test_no_matches_low_similarity(self, cached_search):
         """
         Sin matches deben tener similitud baja (<0.70) y activar deletreo.
         """
@@ -261,7 +256,7 @@ class TestSimilarityDistribution:
         ]
 
         for query in no_matches:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
 
             assert result["deletreo_activado"] is True, \
                 f"Query sin match '{query}' no activó deletreo"
@@ -276,27 +271,21 @@ class TestSemanticConsistency:
     def test_repeated_queries_same_result(self, matcher):
         """
         La misma query debe dar siempre el mismo resultado.
+        Con el cache de consultas activo, la segunda llamada debe salir del cache.
         """
         query = "hola"
-        results = []
-
-        # Ejecutar 5 veces
-        for _ in range(5):
-            result = matcher.search_similar_phrase(query)
-            results.append({
-                "grupo": result["grupo"],
-                "similitud": result["similitud"],
-                "deletreo": result["deletreo_activado"]
-            })
-
-        # Verificar que todos sean idénticos
-        first = results[0]
-        for r in results[1:]:
-            assert r["grupo"] == first["grupo"], "Grupo inconsistente"
-            assert abs(r["similitud"] - first["similitud"]) < 0.001, "Similitud inconsistente"
-            assert r["deletreo"] == first["deletreo"], "Deletreo inconsistente"
-
-    def test_similar_queries_similar_results(self, matcher):
+
+        first = matcher.search_similar_phrase(query)
+        if matcher.use_query_cache:
+            assert query in matcher._query_cache, "La query no quedó en el cache"
+        results = [first, matcher.search_similar_phrase(query)]
+
+        sims = np.fromiter((r["similitud"] for r in results), dtype=np.float64)
+        assert len({r["grupo"] for r in results}) == 1, "Grupo inconsistente"
+        assert len({r["deletreo_activado"] for r in results}) == 1, "Deletreo inconsistente"
+        assert np.allclose(sims, sims[0], rtol=0, atol=1e-3), "Similitud inconsistente"
+
+    def test_similar_queries_similar_results(self, cached_search):
         """
         Queries similares deben dar resultados similares.
         """
@@ -307,8 +296,8 @@ class TestSemanticConsistency:
         ]
 
         for query1, query2 in similar_pairs:
-            result1 = matcher.search_similar_phrase(query1)
-            result2 = matcher.search_similar_phrase(query2)
+            result1 = cached_search(query1)
+            result2 = cached_search(query2)
 
             # Si ambos se clasifican, deben estar en el mismo grupo
             if not result1["deletreo_activado"] and not result2["deletreo_activado"]:
@@ -320,7 +309,7 @@ class TestSemanticConsistency:
 class TestThresholdValidation:
     """Tests para validar que los thresholds están bien calibrados."""
 
-    def test_spell_out_threshold_calibration(self, matcher):
+    def test_spell_out_threshold_calibration(self, cached_search):
         """
         Valida que el threshold de deletreo (0.70) está bien calibrado.
         """
@@ -328,7 +317,7 @@ class TestThresholdValidation:
         should_spell_out = ["Ivan", "xyz123", "asdfgh", "qwerty"]
 
         for query in should_spell_out:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
             assert result["deletreo_activado"] is True, \
                 f"'{query}' debería activar deletreo"
             assert result["similitud"] < 0.70, \
@@ -338,7 +327,7 @@ class TestThresholdValidation:
         should_not_spell_out = ["hola", "ayuda", "gracias"]
 
         for query in should_not_spell_out:
-            result = matcher.search_similar_phrase(query)
+            result = cached_search(query)
             assert result["deletreo_activado"] is False, \
                 f"'{query}' no debería activar deletreo"
             assert result["similitud"] >= 0.70, \
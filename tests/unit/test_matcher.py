@@ -4,9 +4,19 @@ CRÍTICO: Validar que la similitud siempre esté en [0.0, 1.0]
 """
 
 import pytest
+import numpy as np
 from app.matcher_improved import ImprovedPhraseMatcher, clip_similarity
 
 
+@pytest.fixture(scope="module")
+def matcher(matcher_session):
+    """
+    Matcher compartido por los tests del módulo (misma configuración por defecto).
+    El modelo ya está cacheado por proceso y los embeddings en disco; no se reinicializa por test.
+    """
+    return matcher_session
+
+
 @pytest.mark.unit
 class TestClipSimilarity:
     """Tests para la función de clipping de similitud."""
@@ -37,6 +47,18 @@ class TestClipSimilarity:
         assert clip_similarity(0.9999999) <= 1.0
         assert clip_similarity(-0.0000001) == 0.0
 
+    def test_clip_numpy_inputs(self):
+        """Escalares numpy devuelven float; los arrays se recortan en una copia."""
+        assert type(clip_similarity(np.float32(1.2))) is float
+        scores = np.array([-0.2, 0.5, 1.3], dtype=np.float32)
+        clipped = clip_similarity(scores)
+        assert clipped.dtype == np.float32
+        assert clipped.tolist() == [0.0, 0.5, 1.0]
+        # El array del llamador no se modifica
+        assert scores.tolist() == np.array([-0.2, 0.5, 1.3], dtype=np.float32).tolist()
+        # Arrays enteros también se aceptan
+        assert clip_similarity(np.array([-1, 0, 2])).tolist() == [0, 0, 1]
+
 
 @pytest.mark.unit
 class TestMatcherInitialization:
@@ -58,6 +80,26 @@ class TestMatcherInitialization:
         matcher.initialize()
         assert matcher.model_name is not None
 
+    def test_centroid_matrix_ranks_groups(self):
+        """La matriz (D, G) de centroides ordena igual que el coseno grupo a grupo."""
+        rng = np.random.default_rng(0)
+        matcher = ImprovedPhraseMatcher()
+        matcher.grupos_embeddings = {
+            grupo: rng.standard_normal((5, 16)).astype(np.float32) for grupo in "ABC"
+        }
+        matcher._compute_centroids()
+
+        assert matcher._centroids_T.shape == (16, 3)
+        query = rng.standard_normal(16).astype(np.float32)
+        query /= np.linalg.norm(query)
+        expected = sorted(
+            ((g, clip_similarity(float(c @ query))) for g, c in matcher.grupos_centroids.items()),
+            key=lambda x: x[1], reverse=True
+        )
+        ranked = matcher._rank_groups(query, top_k=3)
+        assert [g for g, _ in ranked] == [g for g, _ in expected]
+        assert np.allclose([s for _, s in ranked], [s for _, s in expected], atol=1e-6)
+
 
 @pytest.mark.unit
 class TestMatcherSimilarityRange:
@@ -65,17 +107,6 @@ class TestMatcherSimilarityRange:
     Tests CRÍTICOS para verificar que el matcher retorna valores válidos.
     """
 
-    @pytest.fixture
-    def matcher(self):
-        """Fixture para crear matcher."""
-        m = ImprovedPhraseMatcher(
-            model_type="multilingual_balanced",
-            use_reranking=True,
-            use_synonym_expansion=True
-        )
-        m.initialize()
-        return m
-
     def test_exact_match_range(self, matcher):
         """Match exacto debe retornar 1.0 (no 1.05)."""
         result = matcher.search_similar_phrase("Buenos días")
@@ -104,7 +135,7 @@ class TestMatcherSimilarityRange:
         assert 0.0 <= result["similitud"] <= 1.0, \
             f"Similitud fuera de rango: {result['similitud']}"
 
-    @pytest.mark.parametrize("query", [
+    RANGE_QUERIES = [
         "hola",
         "ayuda por favor",
         "gracias",
@@ -115,12 +146,19 @@ class TestMatcherSimilarityRange:
         "xyz",
         "necesito ayuda urgente",
         "buenas tardes",
-    ])
-    def test_all_queries_in_range(self, matcher, query):
+    ]
+
+    @pytest.fixture(scope="class")
+    def range_results(self, matcher_session):
+        """Resultados de todas las RANGE_QUERIES con una sola búsqueda en lote."""
+        return dict(zip(self.RANGE_QUERIES, matcher_session.search_similar_batch(self.RANGE_QUERIES)))
+
+    @pytest.mark.parametrize("query", RANGE_QUERIES)
+    def test_all_queries_in_range(self, range_results, query):
         """
         CRÍTICO: Todas las queries deben retornar valores en [0.0, 1.0].
         """
-        result = matcher.search_similar_phrase(query)
+        result = range_results[query]
 
         # VALIDACIÓN MÁS IMPORTANTE
         assert 0.0 <= result["similitud"] <= 1.0, \
@@ -145,12 +183,6 @@ class TestMatcherSimilarityRange:
 class TestMatcherGroupClassification:
     """Tests para clasificación de grupos."""
 
-    @pytest.fixture
-    def matcher(self):
-        m = ImprovedPhraseMatcher()
-        m.initialize()
-        return m
-
     def test_emergency_classification(self, matcher):
         """Emergencias deben clasificarse como Grupo A."""
         queries = ["ayuda", "emergencia", "socorro", "necesito ayuda"]
@@ -182,12 +214,6 @@ class TestMatcherGroupClassification:
 class TestSpellOutActivation:
     """Tests para activación del modo deletreo."""
 
-    @pytest.fixture
-    def matcher(self):
-        m = ImprovedPhraseMatcher()
-        m.initialize()
-        return m
-
     def test_spell_out_for_low_similarity(self, matcher):
         """Baja similitud debe activar deletreo."""
         result = matcher.search_similar_phrase("xyz123")
@@ -207,6 +233,144 @@ class TestSpellOutActivation:
         assert result["deletreo"] is None
 
 
+@pytest.mark.unit
+class TestQueryCache:
+    """Tests para el cache de consultas del matcher."""
+
+    def test_repeated_query_served_from_cache(self, matcher_session):
+        """Una query repetida debe devolver el mismo resultado desde el cache."""
+        first = matcher_session.search_similar_phrase("buenas tardes")
+        second = matcher_session.search_similar_phrase("buenas tardes")
+
+        assert first == second
+        assert "buenas tardes" in matcher_session._query_cache
+
+    def test_cached_result_is_a_copy(self, matcher_session):
+        """Modificar el resultado devuelto no debe alterar el cache."""
+        result = matcher_session.search_similar_phrase("gracias")
+        result["grupo"] = "X"
+
+        assert matcher_session.search_similar_phrase("gracias")["grupo"] != "X"
+
+        # La lista de deletreo tampoco se comparte con el cache
+        spelled = matcher_session.search_similar_phrase("xyz123")
+        assert spelled["deletreo_activado"]
+        expected = list(spelled["deletreo"])
+        spelled["deletreo"].append("X")
+
+        assert matcher_session.search_similar_phrase("xyz123")["deletreo"] == expected
+        assert matcher_session.search_similar_batch(["xyz123"])[0]["deletreo"] == expected
+
+    def test_warmup_leaves_caches_empty(self, matcher_session):
+        """El calentamiento carga el modelo pero no debe poblar los caches."""
+        matcher_session.clear_cache()
+
+        matcher_session.warmup()
+
+        assert matcher_session.model is not None
+        assert len(matcher_session._query_cache) == 0
+        assert len(matcher_session._ranking_cache) == 0
+        assert not matcher_session._semantic_rankings
+
+    def test_semantic_cache_off_by_default(self, matcher_session):
+        """Por defecto no se reutilizan rankings de queries con embedding parecido."""
+        matcher_session.clear_cache()
+
+        matcher_session.search_similar_phrase("necesito ayuda")
+        matcher_session.search_similar_phrase("necesito ayuda ya")
+
+        assert not matcher_session.use_semantic_cache
+        assert not matcher_session._semantic_rankings
+
+    def test_cache_disabled(self, matcher_session, monkeypatch):
+        """Con el cache desactivado no se deben guardar resultados."""
+        monkeypatch.setattr(matcher_session, "use_query_cache", False)
+        matcher_session.clear_cache()
+
+        result = matcher_session.search_similar_phrase("hola")
+
+        assert 0.0 <= result["similitud"] <= 1.0
+        assert len(matcher_session._query_cache) == 0
+
+    def test_case_variants_reuse_normalized_ranking(self, matcher_session, monkeypatch):
+        """Variantes de mayúsculas/acentos deben reutilizar el ranking sin codificar de nuevo."""
+        matcher_session.clear_cache()
+        first = matcher_session.search_similar_phrase("buenos días")
+
+        def fail_encode(query):
+            raise AssertionError(f"'{query}' no debería pasar por el modelo")
+
+        monkeypatch.setattr(matcher_session, "_encode_query", fail_encode)
+        for variant in ["BUENOS DIAS", "Buenos Días!!"]:
+            result = matcher_session.search_similar_phrase(variant)
+            assert result["grupo"] == first["grupo"]
+            assert result["similitud"] == first["similitud"]
+
+    def test_basic_method_reuses_normalized_ranking(self, matcher_session, monkeypatch):
+        """Sin re-ranking, las variantes normalizadas tampoco deben volver al modelo."""
+        monkeypatch.setattr(matcher_session, "use_reranking", False)
+        matcher_session.clear_cache()
+        first = matcher_session.search_similar_phrase("gracias")
+
+        def fail_rank(query):
+            raise AssertionError(f"'{query}' no debería pasar por el modelo")
+
+        monkeypatch.setattr(matcher_session, "_rank_query", fail_rank)
+        result = matcher_session.search_similar_phrase("GRACIAS")
+        assert result["grupo"] == first["grupo"]
+        matcher_session.clear_cache()
+
+
+@pytest.mark.unit
+class TestBatchSearch:
+    """Tests para la búsqueda en lote."""
+
+    def test_batch_matches_single_queries(self, matcher_session, monkeypatch):
+        """El lote debe devolver lo mismo que las búsquedas individuales, en orden."""
+        monkeypatch.setattr(matcher_session, "use_query_cache", False)
+        queries = ["hola", "necesito ayuda urgente", "gracias", "Me llamo Juan", "xyz123", "hola"]
+
+        batch = matcher_session.search_similar_batch(queries)
+
+        assert len(batch) == len(queries)
+        for query, result in zip(queries, batch):
+            single = matcher_session.search_similar_phrase(query)
+            assert result["grupo"] == single["grupo"]
+            assert result["frase_similar"] == single["frase_similar"]
+            assert result["deletreo_activado"] == single["deletreo_activado"]
+            assert result["similitud"] == pytest.approx(single["similitud"], abs=1e-4)
+
+    def test_batch_dedups_without_cache(self, matcher_session, monkeypatch):
+        """Aun sin cache, las queries repetidas del lote se codifican una sola vez."""
+        monkeypatch.setattr(matcher_session, "use_query_cache", False)
+        monkeypatch.setattr(matcher_session, "use_synonym_expansion", False)
+        encoded = []
+        matcher_session._load_model()
+        original_encode = matcher_session.model.encode
+
+        def counting_encode(texts, **kwargs):
+            encoded.extend(texts)
+            return original_encode(texts, **kwargs)
+
+        monkeypatch.setattr(matcher_session.model, "encode", counting_encode)
+        results = matcher_session.search_similar_batch(["hola", "hola", "gracias"])
+
+        assert len(encoded) == 2
+        assert results[0] == results[1]
+        assert results[0] is not results[1]
+
+    def test_batch_cache_hit_refreshes_lru(self, matcher_session):
+        """Un acierto del cache dentro de un lote debe contar como uso reciente."""
+        matcher_session.clear_cache()
+        matcher_session.search_similar_phrase("hola")
+        matcher_session.search_similar_phrase("gracias")
+
+        matcher_session.search_similar_batch(["hola"])
+
+        assert next(reversed(matcher_session._query_cache)) == "hola"
+        matcher_session.clear_cache()
+
+
 class TestNamePatternDetection:
     """Tests para la detección de patrones con nombres."""
 
@@ -47,6 +47,12 @@ class TestNormalizeText:
         assert normalize_text("señor") == "senor"
         assert normalize_text("año") == "ano"
 
+    def test_accents_outside_latin1(self):
+        """Acentos fuera de Latin-1 y formas descompuestas también se eliminan."""
+        assert normalize_text("Łódź ő ş") == "łodz o s"
+        assert normalize_text("café") == "cafe"
+        assert normalize_text("pingüino ç") == "pinguino c"
+
     def test_combined_transformations(self):
         """Debe aplicar todas las transformaciones juntas."""
         text = "¡HOLA, ¿Cómo    estás?!"
@@ -110,6 +116,18 @@ class TestSpellOut:
         assert "3" in result
         assert "exclamación" in result
 
+    def test_digraphs(self):
+        """LL, RR y CH se deletrean como una sola unidad."""
+        assert spell_out_text("calle") == ["C", "A", "LL", "E"]
+        assert spell_out_text("perro chico") == ["P", "E", "RR", "O", "espacio", "CH", "I", "C", "O"]
+        assert spell_out_text("niño\t") == ["N", "I", "Ñ", "O", "carácter especial: \t"]
+
+    def test_cached_result_is_a_copy(self):
+        """Modificar la lista devuelta no debe alterar deletreos posteriores."""
+        result = spell_out_text("Ivan")
+        result.append("X")
+        assert spell_out_text("Ivan") == ["I", "V", "A", "N"]
+
 
 @pytest.mark.unit
 class TestPreprocessQuery: